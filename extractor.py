@@ -21,11 +21,15 @@ Update paths if necessary:
   OUTPUT_ROOT        Root folder for extraction and output
 
 """
+import functools
+import io
 import json
 import re
 import subprocess  # noqa: S404
 import sys
 import os # Added for Git operations and path control
+import shutil
+import tempfile
 from pathlib import Path
 from typing import Any, Dict, List, Set, Tuple
 import yaml
@@ -34,6 +38,13 @@ import pandas as pd
 from datetime import datetime # Import datetime
 from dotenv import load_dotenv # Added to load environment variables
 import zipfile  # Per la creazione dello zip
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+
+try:
+    import orjson  # Optional: faster JSON parsing/serialization straight from/to bytes
+except ImportError:
+    orjson = None
 
 # ----------------------------------------------------------------------
 # Configuration
@@ -66,6 +77,7 @@ VERBOSE = config["options"].get("verbose", False)
 # Output elements configuration
 OUTPUT_ELEMENTS = config.get("output_elements", {})
 SAVE_CSV = OUTPUT_ELEMENTS.get("save_csv", True)
+SAVE_PARQUET = OUTPUT_ELEMENTS.get("save_parquet", False) # Requires pyarrow
 SAVE_EXCEL = OUTPUT_ELEMENTS.get("save_excel", True)
 SAVE_JSON_DIFF = OUTPUT_ELEMENTS.get("save_json_diff", True)
 SAVE_MARKDOWN_DIFF = OUTPUT_ELEMENTS.get("save_markdown_diff", True)
@@ -92,26 +104,19 @@ GIT_TOKEN = os.getenv("GIT_TOKEN")
 # ----------------------------------------------------------------------
 # Git Command Helper
 # ----------------------------------------------------------------------
+# user:secret@ credentials embedded in an http(s) URL
+_GIT_CRED_RE = re.compile(r'(https?://[^:/@]+:)[^@]+(@)')
+
+def _mask_git_credentials(text: str) -> str:
+    """Hides the secret part of credentials embedded in http(s) URLs"""
+    return _GIT_CRED_RE.sub(r'\1<TOKEN_HIDDEN>\2', text)
+
 def _run_git_command(git_args: List[str], working_dir: Path) -> subprocess.CompletedProcess[str]:
     """Runs a Git command and handles output/errors."""
     cmd = ["git"] + git_args
 
     # Mask the token in the command arguments for logging
-    logged_cmd_display_parts = []
-    for arg in cmd:
-        if GIT_TOKEN and GIT_TOKEN in arg and ("http://" in arg or "https://" in arg) and "@" in arg:
-            try:
-                protocol, rest_with_creds = arg.split("://", 1)
-                creds_part, host_and_path = rest_with_creds.split("@", 1)
-                user_part, token_part_in_url = creds_part.split(":", 1)
-                if token_part_in_url == GIT_TOKEN:
-                    logged_cmd_display_parts.append(f"{protocol}://{user_part}:<TOKEN_HIDDEN>@{host_and_path}")
-                else:
-                    logged_cmd_display_parts.append(arg) # Different token or unexpected format
-            except ValueError:
-                logged_cmd_display_parts.append(arg.replace(GIT_TOKEN, "<TOKEN_HIDDEN>")) # Fallback
-        else:
-            logged_cmd_display_parts.append(arg)
+    logged_cmd_display_parts = [_mask_git_credentials(arg) for arg in cmd]
 
     print(f"ℹ️ Executing Git: {' '.join(logged_cmd_display_parts)} in {working_dir}")
     try:
@@ -123,7 +128,7 @@ def _run_git_command(git_args: List[str], working_dir: Path) -> subprocess.Compl
             print(f"Git stderr: {proc.stderr.strip()}")
         return proc
     except subprocess.CalledProcessError as e:
-        print(f"❌ Error during Git command execution: {' '.join(cmd)}")
+        print(f"❌ Error during Git command execution: {' '.join(logged_cmd_display_parts)}")
         print(f"Return code: {e.returncode}")
         if e.stdout:
             print(f"Stdout: {e.stdout.strip()}")
@@ -149,8 +154,9 @@ def _run_cli(cmd: List[str | Path]) -> subprocess.CompletedProcess[str]:
 # ----------------------------------------------------------------------
 # Manage PBI Session
 # ----------------------------------------------------------------------
+@functools.lru_cache(maxsize=1)
 def get_first_pbi_session() -> Dict[str, str]:
-    """Returns pbix_path and pid of the first open Power BI Desktop session"""
+    """Returns pbix_path and pid of the first open Power BI Desktop session (cached for the run)"""
     print("🔍 Searching for Power BI Desktop session…", end=" ")
     proc = _run_cli([PBI_TOOLS_EXE, "info"])
     raw = proc.stdout
@@ -158,7 +164,7 @@ def get_first_pbi_session() -> Dict[str, str]:
     if idx < 0:
         print("❌")
         raise RuntimeError("No JSON found in pbi-tools info")
-    info = json.loads(raw[idx:])
+    info, _ = json.JSONDecoder().raw_decode(raw, idx) # Parse in place from idx, no substring copy
     sessions = info.get("pbiSessions", [])
     if not sessions:
         print("❌")
@@ -188,138 +194,193 @@ def extract_model(session: Dict[str, str], EXTRACT_FOLDER: Path) -> Path:
 # ----------------------------------------------------------------------
 # Parsing and metadata collection
 # ----------------------------------------------------------------------
+def parse_model(raw: bytes | None) -> Dict[str, Any] | None:
+    """Parses database.json bytes and returns the dict containing 'model' (None if unreadable)"""
+    if raw is None:
+        return None
+    try:
+        data = orjson.loads(raw) if orjson else json.loads(raw)
+    except:
+        return None
+    return data.get("model", {})
+
 def load_model(path: Path) -> Dict[str, Any]:
     """Loads JSON and returns the dict containing 'model'"""
     print(f"📂 Loading model from {path}…", end=" ")
     try:
-        data = json.loads(path.read_text(encoding="utf-8"))
-    except:
+        model = parse_model(path.read_bytes())
+    except OSError:
+        model = None
+    if model is None:
         print("❌ No model found")
         return None
-    model = data.get("model", {})
     print("✅ model loaded")
     return model
 
 def collect_metadata(model: Dict[str, Any]) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
     """Extracts DataFrames for tables, fields, and relationships"""
-    tables: List[Dict[str, Any]] = []
-    fields: List[Dict[str, Any]] = []
-    rels: List[Dict[str, Any]] = []
+    # Column-oriented buffers: one list per output column, turned into DataFrames at the end
+    t_name: List[str] = []
+    t_hidden: List[bool] = []
+    t_desc: List[str] = []
+
+    f_table: List[str] = []
+    f_name: List[str] = []
+    f_type: List[str] = []
+    f_is_measure: List[bool] = []
+    f_data_type: List[Any] = []
+    f_hidden: List[bool] = []
+    f_desc: List[str] = []
+    f_expr: List[Any] = []
+
+    r_from_table: List[str] = []
+    r_from_col: List[str] = []
+    r_to_table: List[str] = []
+    r_to_col: List[str] = []
+    r_card: List[str] = []
+    r_cross: List[str] = []
+    r_active: List[bool] = []
 
     for tbl in model.get("tables", []):
-        tables.append({
-            "table_name": tbl["name"],
-            "is_hidden": tbl.get("isHidden", False),
-            "description": tbl.get("description", ""),
-        })
-        for col in tbl.get("columns", []):
-            fields.append({
-                "table": tbl["name"],
-                "object_name": col["name"],
-                "object_type": "column",
-                "is_measure": False,
-                "data_type": col.get("dataType"),
-                "is_hidden": col.get("isHidden", False),
-                "description": col.get("description", ""),
-                "expression": None,
-            })
-        for meas in tbl.get("measures", []):
-            fields.append({
-                "table": tbl["name"],
-                "object_name": meas["name"],
-                "object_type": "measure",
-                "is_measure": True,
-                "data_type": None,
-                "is_hidden": meas.get("isHidden", False),
-                "description": meas.get("description", ""),
-                "expression": meas.get("expression", ""),
-            })
+        tbl_get = tbl.get
+        tbl_name = tbl["name"]
+        t_name.append(tbl_name)
+        t_hidden.append(tbl_get("isHidden", False))
+        t_desc.append(tbl_get("description", ""))
+        # Bulk-extend per table: constant columns are filled at C level by repeat()
+        cols = tbl_get("columns", [])
+        n_cols = len(cols)
+        f_table.extend(repeat(tbl_name, n_cols))
+        f_name.extend([col["name"] for col in cols])
+        f_type.extend(repeat("column", n_cols))
+        f_is_measure.extend(repeat(False, n_cols))
+        f_data_type.extend([col.get("dataType") for col in cols])
+        f_hidden.extend([col.get("isHidden", False) for col in cols])
+        f_desc.extend([col.get("description", "") for col in cols])
+        f_expr.extend(repeat(None, n_cols))
+
+        measures = tbl_get("measures", [])
+        n_meas = len(measures)
+        f_table.extend(repeat(tbl_name, n_meas))
+        f_name.extend([meas["name"] for meas in measures])
+        f_type.extend(repeat("measure", n_meas))
+        f_is_measure.extend(repeat(True, n_meas))
+        f_data_type.extend(repeat(None, n_meas))
+        f_hidden.extend([meas.get("isHidden", False) for meas in measures])
+        f_desc.extend([meas.get("description", "") for meas in measures])
+        f_expr.extend([meas.get("expression", "") for meas in measures])
    
     for rel in model.get("relationships", []):
+        rel_get = rel.get
         # Cardinality ----------------------------------------------------------
         if "fromCardinality" in rel or "toCardinality" in rel:
-                from_card = rel.get("fromCardinality", "many")
-                to_card   = rel.get("toCardinality",   "one")
+                from_card = rel_get("fromCardinality", "many")
+                to_card   = rel_get("toCardinality",   "one")
                 cardinality = f"{from_card}:{to_card}"
         else:
                 cardinality = "many:one"                     # ← default
 
-        # Filter propagation ---------------------------------------------------
-        cross_filter = rel.get("crossFilteringBehavior", "singleDirection")
-
         # Save row ---------------------------------------------------------
-        rels.append({
-            "from_table":  rel["fromTable"],
-            "from_column": rel["fromColumn"],
-            "to_table":    rel["toTable"],
-            "to_column":   rel["toColumn"],
-            "cardinality": cardinality,
-            "cross_filtering_behavior": cross_filter,
-            "is_active":  rel.get("isActive", True),
-        })
-
-       
-    return pd.DataFrame(tables), pd.DataFrame(fields), pd.DataFrame(rels)
+        r_from_table.append(rel["fromTable"])
+        r_from_col.append(rel["fromColumn"])
+        r_to_table.append(rel["toTable"])
+        r_to_col.append(rel["toColumn"])
+        r_card.append(cardinality)
+        # Filter propagation
+        r_cross.append(rel_get("crossFilteringBehavior", "singleDirection"))
+        r_active.append(rel_get("isActive", True))
+
+    tables_df = pd.DataFrame({
+        "table_name": t_name,
+        "is_hidden": t_hidden,
+        "description": t_desc,
+    }).astype({"is_hidden": "bool"})
+    fields_df = pd.DataFrame({
+        "table": f_table,
+        "object_name": f_name,
+        "object_type": f_type,
+        "is_measure": f_is_measure,
+        "data_type": f_data_type,
+        "is_hidden": f_hidden,
+        "description": f_desc,
+        "expression": f_expr,
+    }).astype({"table": "category", "object_type": "category", "is_measure": "bool", "is_hidden": "bool"}) # Categories: low-cardinality repeated strings
+    rels_df = pd.DataFrame({
+        "from_table": r_from_table,
+        "from_column": r_from_col,
+        "to_table": r_to_table,
+        "to_column": r_to_col,
+        "cardinality": r_card,
+        "cross_filtering_behavior": r_cross,
+        "is_active": r_active,
+    }).astype({"is_active": "bool"})
+    return tables_df, fields_df, rels_df
 
 # ----------------------------------------------------------------------
 # Differences between models
 # ----------------------------------------------------------------------
-def diff_models(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, List[Any]]:
-    """Compares two model dicts and returns structural differences"""
-    diff = {key: [] for key in (
-        "tables_added", "tables_removed",
-        "fields_added", "fields_removed",
-        "relations_added", "relations_removed",
-    )}
+def diff_models(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Set[Any]]:
+    """Compares two model dicts and returns structural differences.
+
+    Each section is returned as an unordered set; export sites sort only what they write.
+    """
     # Tabelle
     old_t = {t["name"] for t in old.get("tables", [])}
     new_t = {t["name"] for t in new.get("tables", [])}
-    diff["tables_added"] = sorted(new_t - old_t)
-    diff["tables_removed"] = sorted(old_t - new_t)
     # Campi
     def gather_fields(m: Dict[str, Any]) -> Set[Tuple[str, str]]:
         s: Set[Tuple[str, str]] = set()
         for t in m.get("tables", []):
             tbl = t["name"]
-            s |= {(tbl, c["name"]) for c in t.get("columns", [])}
-            s |= {(tbl, m2["name"]) for m2 in t.get("measures", [])}
+            s.update((tbl, c["name"]) for c in t.get("columns", []))
+            s.update((tbl, m2["name"]) for m2 in t.get("measures", []))
         return s
     old_f = gather_fields(old)
     new_f = gather_fields(new)
-    diff["fields_added"] = sorted(new_f - old_f)
-    diff["fields_removed"] = sorted(old_f - new_f)
     # Relazioni
     def gather_rels(m: Dict[str, Any]) -> Set[Tuple[str, str, str, str]]:
-        return {(
+        return set((
             r["fromTable"], r["fromColumn"], r["toTable"], r["toColumn"]
-        ) for r in m.get("relationships", [])}
+        ) for r in m.get("relationships", []))
     old_r = gather_rels(old)
     new_r = gather_rels(new)
-    diff["relations_added"] = sorted(new_r - old_r)
-    diff["relations_removed"] = sorted(old_r - new_r)
-    return diff
+    return {
+        "tables_added": new_t - old_t,
+        "tables_removed": old_t - new_t,
+        "fields_added": new_f - old_f,
+        "fields_removed": old_f - new_f,
+        "relations_added": new_r - old_r,
+        "relations_removed": old_r - new_r,
+    }
+
+def sorted_diff(diff: Dict[str, Set[Any]]) -> Dict[str, List[Any]]:
+    """Returns a copy of the diff with every section sorted (for JSON export)"""
+    return {key: sorted(items) for key, items in diff.items()}
 
 # ----------------------------------------------------------------------
 # Export generation
 # ----------------------------------------------------------------------
-def diff_to_markdown(diff: Dict[str, List[Any]], include_header: bool = True) -> str:
+def diff_to_markdown(diff: Dict[str, Set[Any]], include_header: bool = True) -> str:
     """Generates Markdown report with Added/Removed items per concept"""
-    md: List[str] = []
+    buf = io.StringIO()
+    w = buf.write
     if include_header:
-        md.extend(["# Model Diff Report", ""])
+        w("# Model Diff Report\n")
     sections = [
         ("tables", "Tables"),
         ("fields", "Fields (Table, Field)"),
         ("relations", "Relationships (FromTbl, FromCol, ToTbl, ToCol)"),
     ]
     for key, title in sections:
-        added = diff.get(f"{key}_added", [])
-        removed = diff.get(f"{key}_removed", [])
+        added = diff.get(f"{key}_added", ())
+        removed = diff.get(f"{key}_removed", ())
         if not added and not removed:
             continue
-        md.extend([f"## {title}", ""])
-        md.append("| Added | Removed |")
-        md.append("|---|---|")
+        added = sorted(added)
+        removed = sorted(removed)
+        if buf.tell():
+            w("\n") # Blank line between blocks
+        w(f"## {title}\n\n| Added | Removed |\n|---|---|\n")
         rows = max(len(added), len(removed))
         for i in range(rows):
             a =  added[i] if i < len(added) else ""
@@ -328,67 +389,114 @@ def diff_to_markdown(diff: Dict[str, List[Any]], include_header: bool = True) ->
                 a = ", ".join(a)
             if isinstance(r, tuple):
                 r = ", ".join(r)
-            md.append(f"| ✅ {a} | ❌ {r} |")
-        md.append("")
-    return "\n".join(md)
+            w(f"| ✅ {a} | ❌ {r} |\n")
+    return buf.getvalue()
+
+_SANITIZE_RE = re.compile(r'[^A-Za-z0-9]')
+
+@functools.lru_cache(maxsize=4096)
+def _sanitize(name: str) -> str:
+    """Sanitizes a name for Mermaid IDs (alpha-numeric underscore); cached, table names repeat across relationships"""
+    return _SANITIZE_RE.sub('_', name)
+
+# Mermaid relationship symbols by cardinality; inactive relationships use a dotted line
+_ACTIVE_SYM = {
+    "one:many": "||--o{",
+    "many:one": "}o--||",
+    "one:one": "||--||",
+    "many:many": "}o--o{",
+}
+_INACTIVE_SYM = {card: sym.replace("--", "..") for card, sym in _ACTIVE_SYM.items()}
 
 def model_to_mermaid(tables_df: pd.DataFrame, rels_df: pd.DataFrame) -> str:
     """Generates a Mermaid ER diagram from tables and relationships DataFrames"""
-    def cardinality_symbol(cardinality: str, is_active: bool) -> str:
-        mapping = {
-            "one:many": "||--o{",
-            "many:one": "}o--||",
-            "one:one": "||--||",
-            "many:many": "}o--o{",
-        }
-        if is_active:
-            return mapping.get(cardinality, "||--||")
-        else:
-            return mapping.get(cardinality, "||--||").replace("--","..")
-
-    def sanitize(name: str) -> str:
-        """Sanitizes a name for Mermaid ID (alpha-numeric underscore)"""
-        return re.sub(r'[^A-Za-z0-9]', '_', name)
+    def escape(names: pd.Series) -> pd.Series:
+        return names.str.replace('"', '\\"', regex=False)
 
-    lines: List[str] = ["```mermaid", "erDiagram"]
+    table_lines: List[str] = []
+    rel_lines: List[str] = []
 
     # Tabelle
-    for _, row in tables_df.iterrows():
-        table_id = sanitize(row["table_name"])
-        label = row["table_name"].replace('"', '\\"')
-        lines.append(f'{table_id} as "{label}"')
+    if not tables_df.empty:
+        table_names = tables_df["table_name"]
+        table_lines = (table_names.map(_sanitize) + ' as "' + escape(table_names) + '"').tolist()
 
     # Relazioni
-    for _, row in rels_df.iterrows():
-        frm = sanitize(row["from_table"])
-        to = sanitize(row["to_table"])
-        frm_col = row["from_column"].replace('"', '\\"')
-        to_col = row["to_column"].replace('"', '\\"')
-        label = f"{frm_col}→{to_col}"
-        symbol = cardinality_symbol(row.get("cardinality", ""),row["is_active"])
-
-        lines.append(f'{frm} {symbol} {to} : "{label}"')
-
-    lines.append("```")
-    return "\n".join(lines)
+    if not rels_df.empty:
+        symbols = [
+            _ACTIVE_SYM.get(card, "||--||") if active else _INACTIVE_SYM.get(card, "||..||")
+            for card, active in zip(rels_df["cardinality"].to_numpy(), rels_df["is_active"].to_numpy())
+        ]
+        rel_lines = (
+            rels_df["from_table"].map(_sanitize) + " " + pd.Series(symbols, index=rels_df.index) + " "
+            + rels_df["to_table"].map(_sanitize) + ' : "'
+            + escape(rels_df["from_column"]) + "→" + escape(rels_df["to_column"]) + '"'
+        ).tolist()
+
+    return "\n".join(["```mermaid", "erDiagram", *table_lines, *rel_lines, "```"])
+
+def _cell_text(value: Any) -> Any:
+    """Returns a cell value xlsxwriter/Arrow can write: lists (multi-line DAX in Raw serialization) as lines, other non-scalars as str"""
+    if isinstance(value, list):
+        return "\n".join(map(str, value))
+    return value if pd.api.types.is_scalar(value) else str(value)
+
+def _write_sheet(workbook: xlsxwriter.Workbook, sheet_name: str, df: pd.DataFrame, header_format: Any) -> None:
+    """Writes a DataFrame to a new worksheet row by row (header first, missing values as blank cells)"""
+    ws = workbook.add_worksheet(sheet_name)
+    ws.write_row(0, 0, [str(c) for c in df.columns], header_format)
+    values = df.astype(object)
+    # Only object columns can hold lists/dicts (e.g. a measure expression split into lines)
+    for col in df.columns[df.dtypes == object]:
+        values[col] = df[col].map(_cell_text, na_action="ignore").astype(object)
+    values = values.where(df.notna(), None)
+    for i, row in enumerate(values.itertuples(index=False, name=None), 1):
+        ws.write_row(i, 0, row)
 
 def export_metadata_to_excel(tables_df: pd.DataFrame, fields_df: pd.DataFrame, rels_df: pd.DataFrame, output_path: str) -> None:
     """Exports metadata to an Excel file with one sheet per table and one for relationships."""
-    with pd.ExcelWriter(output_path, engine='xlsxwriter') as writer:
+    # constant_memory streams each row to disk as soon as it is written (rows must be written in order)
+    workbook = xlsxwriter.Workbook(str(output_path), {'constant_memory': True, 'strings_to_numbers': False})
+    try:
+        # Same header look as pandas' to_excel
+        header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+
         # Initial sheet with relationships
-        rels_df.to_excel(writer, sheet_name="Relazioni", index=False)
+        _write_sheet(workbook, "Relazioni", rels_df, header_format)
 
-        # One sheet for each table with its fields
+        # One sheet for each table with its fields (partitioned in a single groupby pass)
+        groups = dict(list(fields_df.groupby("table", sort=False, observed=True))) if not fields_df.empty else {}
+        no_fields = fields_df.iloc[0:0]
         for table in tables_df["table_name"].unique():
-            fields_for_table = fields_df[fields_df["table"] == table]
+            fields_for_table = groups.get(table, no_fields)
             sheet_name = table[:31]  # Excel limit: max 31 chars for sheet name
-            fields_for_table.to_excel(writer, sheet_name=sheet_name, index=False)
+            _write_sheet(workbook, sheet_name, fields_for_table, header_format)
+    finally:
+        workbook.close()
 
 
 # ----------------------------------------------------------------------
 # Changelog generation
 # ----------------------------------------------------------------------
-def update_changelog(changelog_path: Path, model_name: str, current_date: str, diff: Dict[str, List[Any]] | None) -> None:
+_CHANGELOG_ENTRY_MARKER = b"## Updated Version at"
+
+def _find_changelog_entry_offset(fh, chunk_size: int = 1 << 16) -> int:
+    """Returns the byte offset of the first changelog entry line, or -1 if there is none"""
+    marker = b"\n" + _CHANGELOG_ENTRY_MARKER
+    pos = 0
+    carry = b"\n" # The start of the file counts as a line start
+    while True:
+        chunk = fh.read(chunk_size)
+        if not chunk:
+            return -1
+        buf = carry + chunk
+        idx = buf.find(marker)
+        if idx >= 0:
+            return pos - len(carry) + idx + 1
+        carry = buf[-(len(marker) - 1):] # Keep enough tail to catch a marker split across chunks
+        pos += len(chunk)
+
+def update_changelog(changelog_path: Path, model_name: str, current_date: str, diff: Dict[str, Set[Any]] | None) -> None:
     """Creates or updates the changelog.md file for the model."""
     print(f"📝 Updating changelog for {model_name} at {changelog_path}...", end=" ")
 
@@ -398,7 +506,8 @@ def update_changelog(changelog_path: Path, model_name: str, current_date: str, d
     new_entry_block_parts.append("### Datamodel\n")
 
     if diff:
-        diff_md_text = diff_to_markdown(diff, include_header=False)
+        # Set truth tests are O(1): render (and sort) only when something changed
+        diff_md_text = diff_to_markdown(diff, include_header=False) if any(diff.values()) else ""
         if diff_md_text.strip():
             new_entry_block_parts.append("### Changes Summary\n")
             new_entry_block_parts.append(diff_md_text)
@@ -430,45 +539,37 @@ def update_changelog(changelog_path: Path, model_name: str, current_date: str, d
         changelog_path.write_text(final_write_content, encoding="utf-8")
         print("🆕 created,", end=" ")
     else:
-        existing_full_content_str = changelog_path.read_text(encoding="utf-8")
-        existing_lines = existing_full_content_str.splitlines(keepends=True)
-        
-        first_entry_line_index = -1
-        for i, line_content in enumerate(existing_lines):
-            if line_content.startswith("## Updated Version at"):
-                first_entry_line_index = i
-                break
-        
-        if first_entry_line_index != -1:
-            # Existing entries found. Content before this is the file's current header.
-            file_header_part = "".join(existing_lines[:first_entry_line_index])
-            
+        # Prepend without decoding the whole history: locate the first entry by a
+        # bounded byte scan, then stream the old entries behind the new one.
+        with open(changelog_path, "rb") as src:
+            first_entry_offset = _find_changelog_entry_offset(src)
+            src.seek(0)
+            # Without entries the whole (small) file is the header
+            file_header_part = src.read() if first_entry_offset < 0 else src.read(first_entry_offset)
+            file_header_part = file_header_part.decode("utf-8").replace("\r\n", "\n")
+
             # Ensure the identified header part is well-formed or use canonical if it's empty/whitespace.
-            if not file_header_part.strip(): 
-                 file_header_part = header_content_str # Use canonical if existing header part is empty
+            if not file_header_part.strip():
+                file_header_part = header_content_str
             elif not file_header_part.endswith("\n\n"): # Ensure it ends with a double newline for separation
                 if file_header_part.endswith("\n"):
                     file_header_part += "\n"
-                else: 
+                else:
                     file_header_part += "\n\n"
 
-            previous_entries_part = "".join(existing_lines[first_entry_line_index:])
-            final_write_content = file_header_part + new_entry_content_str + previous_entries_part
-        else:
-            # No "## Updated Version at" lines found. File might be header-only, empty, or malformed.
-            file_header_part = existing_full_content_str
-            if not file_header_part.strip(): # If existing file is effectively empty
-                file_header_part = header_content_str 
-            else: # Presumed to be a header. Ensure it ends with \n\n.
-                if not file_header_part.endswith("\n\n"):
-                    if file_header_part.endswith("\n"):
-                        file_header_part += "\n"
-                    else:
-                        file_header_part += "\n\n"
-            
-            final_write_content = file_header_part + new_entry_content_str
-            
-        changelog_path.write_text(final_write_content, encoding="utf-8")
+            new_head_bytes = (file_header_part + new_entry_content_str).replace("\n", os.linesep).encode("utf-8")
+            tmp = tempfile.NamedTemporaryFile(dir=changelog_path.parent, prefix=".changelog_", delete=False)
+            try:
+                with tmp:
+                    tmp.write(new_head_bytes)
+                    if first_entry_offset >= 0:
+                        src.seek(first_entry_offset)
+                        shutil.copyfileobj(src, tmp, 1 << 20)
+            except BaseException:
+                os.unlink(tmp.name)
+                raise
+        shutil.copymode(changelog_path, tmp.name) # Temp files are created owner-only
+        os.replace(tmp.name, changelog_path) # Atomic swap: readers never see a half-written changelog
         print("✅ updated.", end=" ")
     
     print() 
@@ -486,7 +587,8 @@ def save_pbix_zip_if_enabled(session: Dict[str, str], output_dir: Path):
     zip_name = f"{pbix_name}_{timestamp}.zip"
     zip_path = output_dir / zip_name
     try:
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        # A .pbix is already a compressed archive: store it as-is instead of re-deflating it
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_STORED, allowZip64=True) as zipf:
             zipf.write(pbix_path, arcname=Path(pbix_path).name)
         print(f"✅ PBIX zippato e salvato come {zip_path}")
     except Exception as e:
@@ -509,6 +611,7 @@ def main() -> None:
         # Define model-specific paths
         EXTRACT_FOLDER = OUTPUT_ROOT / "extracted"
         CSV_FOLDER = OUTPUT_ROOT / "csv"
+        PARQUET_FOLDER = OUTPUT_ROOT / "parquet"
         XLSX_FOLDER = OUTPUT_ROOT / "xlsx"
         JSON_FOLDER = OUTPUT_ROOT / "json"  # Nuova cartella per i JSON
         # DIFF_JSON = OUTPUT_ROOT / "diff_report.json" # Vecchio percorso
@@ -555,7 +658,7 @@ def main() -> None:
                             domain_path_part = rest_of_url.split("@")[-1] 
                             
                             target_remote_url_for_git = f"{protocol}://{GIT_USERNAME}:{GIT_TOKEN}@{domain_path_part}"
-                            display_remote_url = f"{protocol}://{GIT_USERNAME}:{GIT_TOKEN}@{domain_path_part}"
+                            display_remote_url = _mask_git_credentials(target_remote_url_for_git)
                             print(f"ℹ️ URL per Git remote (con autenticazione .env) sarà: {display_remote_url}")
                         else:
                             print(f"ℹ️ Nessun GIT_USERNAME e/o GIT_TOKEN valido trovato in .env, oppure formato GIT_REMOTE_URL non standard.")
@@ -583,16 +686,7 @@ def main() -> None:
                             else:
                                 if existing_remote_name_found:
                                     # Maschera il token anche nell'URL esistente, se presente e corrisponde
-                                    display_configured_url_in_git = configured_url_in_git
-                                    if GIT_TOKEN and GIT_TOKEN in configured_url_in_git and "@" in configured_url_in_git:
-                                        try:
-                                            proto_cfg, rest_cfg = configured_url_in_git.split("://",1)
-                                            creds_cfg, host_path_cfg = rest_cfg.split("@",1)
-                                            user_cfg, token_cfg = creds_cfg.split(":",1)
-                                            if token_cfg == GIT_TOKEN:
-                                                display_configured_url_in_git = f"{proto_cfg}://{user_cfg}:<TOKEN_HIDDEN>@{host_path_cfg}"
-                                        except ValueError:
-                                            pass # Non fa nulla se il formato non è come atteso
+                                    display_configured_url_in_git = _mask_git_credentials(configured_url_in_git)
                                     print(f"ℹ️ Remote '{GIT_REMOTE_NAME}' trovato con URL '{display_configured_url_in_git}'. Aggiornamento a '{display_remote_url}'...")
                                     _run_git_command(["remote", "set-url", GIT_REMOTE_NAME, target_remote_url_for_git], working_dir=git_repo_path)
                                 else: # Remote non esiste
@@ -629,27 +723,69 @@ def main() -> None:
         elif GIT_ENABLED and not GIT_TARGET_DIR:
             print("⚠️ Versionamento Git abilitato ma 'custom_output_root' non è specificato o non è valido in config.yaml. Versionamento Git saltato.")
 
-        old_model = load_model(OLD_MODEL_PATH)
-        model_path = extract_model(session, EXTRACT_FOLDER)
+        # The previous model lives in EXTRACT_FOLDER, which pbi-tools overwrites: snapshot
+        # its bytes first, then parse them while the extraction subprocess runs.
+        try:
+            old_model_raw = OLD_MODEL_PATH.read_bytes()
+        except OSError:
+            old_model_raw = None
+        with ThreadPoolExecutor(max_workers=1) as load_executor:
+            old_model_future = load_executor.submit(parse_model, old_model_raw)
+            model_path = extract_model(session, EXTRACT_FOLDER)
+            old_model = old_model_future.result()
+        print(f"📂 Previous model from {OLD_MODEL_PATH}:", "✅ model loaded" if old_model is not None else "❌ No model found")
         new_model = load_model(model_path)
 
         # Metadata CSVs
         tables_df, fields_df, rels_df = collect_metadata(new_model)
+
+        # Overall XLSX with date: the workbook is written in a background thread
+        # while the remaining outputs are produced, and awaited before Git operations.
+        # (xlsxwriter is not thread-safe within one workbook, so sheets stay sequential.)
+        excel_executor = ThreadPoolExecutor(max_workers=1)
+        excel_future = None
+        XLSX_PATH = XLSX_FOLDER / f"Datamodel_{current_date}.xlsx"
+        if SAVE_EXCEL:
+            excel_future = excel_executor.submit(export_metadata_to_excel, tables_df, fields_df, rels_df, XLSX_PATH)
+        else:
+            print("📄 Excel saving skipped by configuration.")
+
         if SAVE_CSV:
-            tables_df.to_csv(CSV_FOLDER / "tables.csv", index=False)
-            fields_df.to_csv(CSV_FOLDER / "fields.csv", index=False)
-            rels_df.to_csv(CSV_FOLDER / "relations.csv", index=False)
+            # The three files are independent: write them concurrently
+            csv_jobs = [
+                (tables_df, CSV_FOLDER / "tables.csv"),
+                (fields_df, CSV_FOLDER / "fields.csv"),
+                (rels_df, CSV_FOLDER / "relations.csv"),
+            ]
+            with ThreadPoolExecutor(max_workers=len(csv_jobs)) as csv_executor:
+                list(csv_executor.map(lambda job: job[0].to_csv(job[1], index=False), csv_jobs))
             print("💾 CSVs saved to", CSV_FOLDER)
         else:
             print("📄 CSV saving skipped by configuration.")
 
-        # Overall XLSX with date
-        if SAVE_EXCEL:
-            xlsx_filename = f"Datamodel_{current_date}.xlsx"
-            export_metadata_to_excel(tables_df, fields_df, rels_df, XLSX_FOLDER / xlsx_filename)
-            print(f"💾 XLSX saved to {XLSX_FOLDER / xlsx_filename}")
-        else:
-            print("📄 Excel saving skipped by configuration.")
+        # Metadata Parquet (columnar, compressed: faster to reload than CSV for later analysis)
+        if SAVE_PARQUET:
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                pa = None
+                print("⚠️ Parquet saving requires pyarrow (pip install pyarrow). Skipped.")
+            if pa is not None:
+                try:
+                    # Arrow needs one type per column: multi-line expressions (lists) are saved as text.
+                    # All three tables are converted before any file is written.
+                    parquet_fields_df = fields_df.assign(expression=fields_df["expression"].map(_cell_text, na_action="ignore"))
+                    parquet_tables = {
+                        name: pa.Table.from_pandas(df, preserve_index=False)
+                        for name, df in (("tables", tables_df), ("fields", parquet_fields_df), ("relations", rels_df))
+                    }
+                    PARQUET_FOLDER.mkdir(parents=True, exist_ok=True)
+                    for name, table in parquet_tables.items():
+                        pq.write_table(table, PARQUET_FOLDER / f"{name}.parquet", compression="zstd")
+                    print("💾 Parquet files saved to", PARQUET_FOLDER)
+                except (pa.ArrowException, OSError) as e:
+                    print(f"⚠️ Parquet saving failed: {e}")
 
         # Diff JSON & Markdown
         if(old_model != None and new_model != None):
@@ -657,7 +793,10 @@ def main() -> None:
             if SAVE_JSON_DIFF:
                 diff_json_filename = f"diff_report_{current_date}.json"
                 DIFF_JSON_PATH = JSON_FOLDER / diff_json_filename # Nuovo percorso per diff_report.json
-                DIFF_JSON_PATH.write_text(json.dumps(diff, indent=2, ensure_ascii=False), encoding="utf-8")
+                if orjson:
+                    DIFF_JSON_PATH.write_bytes(orjson.dumps(sorted_diff(diff), option=orjson.OPT_INDENT_2))
+                else:
+                    DIFF_JSON_PATH.write_text(json.dumps(sorted_diff(diff), indent=2, ensure_ascii=False), encoding="utf-8")
                 print(f"💾 JSON Diff report saved to {DIFF_JSON_PATH}")
             else:
                 print("📄 JSON Diff report saving skipped by configuration.")
@@ -681,7 +820,6 @@ def main() -> None:
             if model_path.exists():
                 database_json_copy_filename = f"database_{current_date}.json"
                 DATABASE_JSON_COPY_PATH = JSON_FOLDER / database_json_copy_filename
-                import shutil # Importa shutil per copiare il file
                 shutil.copy2(model_path, DATABASE_JSON_COPY_PATH)
                 print(f"💾 Copied database.json to {DATABASE_JSON_COPY_PATH}")
             else:
@@ -696,6 +834,11 @@ def main() -> None:
         else:
             print("📄 Mermaid ER diagram saving skipped by configuration.")
 
+        if excel_future is not None:
+            excel_future.result() # Re-raises any error from the Excel export
+            print(f"💾 XLSX saved to {XLSX_PATH}")
+        excel_executor.shutdown()
+
         print("✅ Operation completed successfully.")
 
         # --- Operazioni Git Finali ---
@@ -2,10 +2,14 @@
 
 """Main script to run the Power BI model extraction, diffing, and versioning process."""
 
+import argparse
+import filecmp
+import os
 import sys
 from pathlib import Path
 from datetime import datetime
 import shutil # For copying database.json as old model
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
 
 # Ensure the src directory is in the Python path for module resolution
 # This is often handled by how you run the script (e.g., python -m src.main)
@@ -22,9 +26,10 @@ from pbi_extractor.config_manager import load_app_config, get_config
 from pbi_extractor.logger_setup import setup_logging, get_logger
 from pbi_extractor.pbi_interaction import get_first_pbi_session, extract_model_from_session
 from pbi_extractor.metadata_parser import load_model_from_json, collect_metadata_from_model
-from pbi_extractor.diff_engine import diff_models
+from pbi_extractor.diff_engine import diff_models, empty_diff
 from pbi_extractor.file_exporters import (
     export_metadata_to_csv,
+    export_metadata_to_parquet,
     export_metadata_to_excel,
     save_diff_to_json,
     save_diff_to_markdown,
@@ -32,7 +37,7 @@ from pbi_extractor.file_exporters import (
     save_database_json_copy,
     create_pbix_zip_archive
 )
-from pbi_extractor.changelog_manager import update_changelog_file
+from pbi_extractor.changelog_manager import flush_changelogs, is_changelog_enabled, queue_changelog_entry, render_changelogs
 from pbi_extractor.git_manager import (
     initialize_git_repository_if_needed,
     configure_git_remote,
@@ -45,6 +50,9 @@ from pbi_extractor.git_manager import (
 # Initialize logger for this main script
 # Logging setup will be done after config is loaded
 
+# Number of Phase 8 export tasks that may run at the same time
+_EXPORT_WORKERS = 6
+
 def main_workflow():
     """Orchestrates the entire PBI model extraction and processing workflow."""
     # 1. Load Configuration
@@ -64,6 +72,9 @@ def main_workflow():
         sys.exit(1)
 
     config = get_config() # Get the globally accessible config
+    # Resolve the nested sections once instead of walking the config dict in every phase
+    output_elements = config.get("output_elements", {})
+    git_config = config.get("git_config", {})
     print("✅ Phase 1 Complete")
 
     # 2. Setup Logging (now that config is loaded)
@@ -80,14 +91,14 @@ def main_workflow():
 
     logger = get_logger(__name__) # Now get the properly configured logger
     logger.info("Application started. Configuration and logging initialized.")
-    logger.debug(f"Full configuration: {config}")
+    logger.debug("Full configuration: %s", config)
 
     # --- Git Pre-operations (if enabled and target dir is BASE_OUTPUT_ROOT) ---
     git_repo_path = get_git_target_dir() # This is usually the custom_output_root or BASE_OUTPUT_ROOT
     if not git_repo_path: # If git_target_dir is None (not custom_output_root), use base_output_root
         git_repo_path = config["base_output_root"]
     
-    git_enabled = config.get("git_config", {}).get("enabled", False)
+    git_enabled = git_config.get("enabled", False)
 
     if git_enabled:
         logger.info(f"Git operations enabled. Target directory: {git_repo_path}")
@@ -117,40 +128,37 @@ def main_workflow():
     # Define output directory for the current model based on PBIX name
     # This will be within the BASE_OUTPUT_ROOT
     current_model_output_dir = config["base_output_root"] / model_name_from_pbix
-    current_model_output_dir.mkdir(parents=True, exist_ok=True)
-    logger.info(f"Output directory for this model: {current_model_output_dir}")
-
     current_model_output_csv_dir = current_model_output_dir / "csv"
-    current_model_output_csv_dir.mkdir(parents=True, exist_ok=True)
-    logger.info(f"Output directory for this model's CSVs: {current_model_output_csv_dir}")
-
     current_model_output_json_dir = current_model_output_dir / "json"
-    current_model_output_json_dir.mkdir(parents=True, exist_ok=True)
-    logger.info(f"Output directory for this model's JSONs: {current_model_output_json_dir}")
-
     current_model_output_excel_dir = current_model_output_dir / "xlsx"
-    current_model_output_excel_dir.mkdir(parents=True, exist_ok=True)
-    logger.info(f"Output directory for this model's Excels: {current_model_output_excel_dir}")
-   
- 
+
     # Define paths for old and new model JSONs
     # The "old" model is the database.json from the *previous* run for this PBIX
     old_model_json_path = current_model_output_dir / "database.json" # This becomes the 'old' model for the next run
     # The "new" model will be extracted into a temporary or specific subfolder first
     extraction_target_folder = current_model_output_dir / "_temp_extraction"
-    extraction_target_folder.mkdir(parents=True, exist_ok=True)
+
+    # Leaf folders only: parents=True creates the model folder along the way
+    for output_subdir in (current_model_output_csv_dir, current_model_output_json_dir, current_model_output_excel_dir, extraction_target_folder):
+        output_subdir.mkdir(parents=True, exist_ok=True)
+    logger.info(f"Output directory for this model: {current_model_output_dir} (csv/, json/, xlsx/)")
     print("✅ Phase 3 Complete")
 
     # 4. Load Old Model (if exists)
     print("⚗️ Phase 4 Loading old model (if exists)...", end=" ")
     old_model_data = None
-    if old_model_json_path.exists() and config.get("output_elements", {}).get("save_database_copy", True):
+    old_model_future = None
+    # The old model only feeds the diff, which only feeds the changelog and the JSON/Markdown diff reports
+    diff_needed = is_changelog_enabled() or output_elements.get("save_json_diff", True) or output_elements.get("save_markdown_diff", True)
+    if not diff_needed:
+        logger.info("Changelog and diff reports are disabled in configuration, not loading the previous model.")
+    elif output_elements.get("save_database_copy", True) and old_model_json_path.exists():
         logger.info(f"Previous model found at: {old_model_json_path}")
-        old_model_data = load_model_from_json(old_model_json_path)
-        if old_model_data:
-            logger.info("Successfully loaded previous model data for comparison.")
-        else:
-            logger.warning(f"Found previous database.json at {old_model_json_path} but failed to load it. Proceeding without diff.")
+        # Parsed on a background thread while pbi-tools extracts the new model (phase 5);
+        # the extraction writes to _temp_extraction, so this file is not touched meanwhile
+        old_model_loader = ThreadPoolExecutor(max_workers=1)
+        old_model_future = old_model_loader.submit(load_model_from_json, old_model_json_path)
+        old_model_loader.shutdown(wait=False)
     else:
         logger.info(f"No previous model found at {old_model_json_path} or database copy disabled. This will be treated as the first run for diff purposes.")
     print("✅ Phase 4 Complete")
@@ -172,6 +180,18 @@ def main_workflow():
         logger.error(f"An unexpected error occurred during model extraction: {e}", exc_info=True)
         sys.exit(1)
 
+    # Re-runs without authoring changes are the common case: identical bytes mean an empty diff,
+    # so the previous model is not needed (its background parse is only awaited before the file is replaced)
+    model_unchanged = old_model_future is not None and filecmp.cmp(old_model_json_path, extracted_new_model_file_path, shallow=False)
+    if model_unchanged:
+        logger.info("No model change detected (database.json is unchanged), not using the previous model.")
+    elif old_model_future is not None:
+        old_model_data = old_model_future.result()
+        if old_model_data:
+            logger.info("Successfully loaded previous model data for comparison.")
+        else:
+            logger.warning(f"Found previous database.json at {old_model_json_path} but failed to load it. Proceeding without diff.")
+
     # Load the newly extracted model data
     new_model_data = load_model_from_json(extracted_new_model_file_path)
     if not new_model_data:
@@ -195,12 +215,17 @@ def main_workflow():
     # 7. Perform Diff (if old model data is available)
     print("🔄 Phase 7 Performing diff (if old model data is available)...", end=" ")
     model_diff_data = None
-    if old_model_data and new_model_data:
+    if not diff_needed:
+        logger.info("Skipping model diff: changelog and diff reports are disabled in configuration.")
+    elif model_unchanged:
+        logger.info("Skipping model diff: database.json is unchanged.")
+        model_diff_data = empty_diff()
+    elif old_model_data and new_model_data:
         logger.info("Performing diff between old and new models...")
         model_diff_data = diff_models(old_model_data, new_model_data)
         if model_diff_data:
             logger.info("Model diff completed.")
-            logger.debug(f"Diff results: {model_diff_data}")
+            logger.debug("Diff results: %s", model_diff_data)
         else:
             logger.warning("Diff operation did not return data, though both models were present.")
     elif not old_model_data:
@@ -216,34 +241,47 @@ def main_workflow():
     current_timestamp = datetime.now().strftime(config["granularity_output"])
     logger.info(f"Generating output files for model '{model_name_from_pbix}' with timestamp '{current_timestamp}'...")
 
-    # CSVs
-    export_metadata_to_csv(tables_df, fields_df, rels_df, current_model_output_csv_dir, model_name_from_pbix)
-    # Excel
-    export_metadata_to_excel(tables_df, fields_df, rels_df, current_model_output_excel_dir, model_name_from_pbix, current_timestamp)
-    # JSON Diff
-    if model_diff_data:
-        save_diff_to_json(model_diff_data, current_model_output_json_dir, model_name_from_pbix)
-    # Markdown Diff Report
-    if model_diff_data:
-        save_diff_to_markdown(model_diff_data, current_model_output_dir, model_name_from_pbix)
-    # Mermaid ER Diagram
-    save_mermaid_er_diagram(tables_df, rels_df, current_model_output_dir, model_name_from_pbix)
-    
-    # Changelog (specific to this model)
-    # The changelog path should be per model, e.g., current_model_output_dir/changelog.md
-    model_changelog_path = current_model_output_dir / "CHANGELOG.md"
-    update_changelog_file(model_changelog_path, model_name_from_pbix, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), model_diff_data)
-
-    # Save a copy of the PBIX file (zipped)
-    create_pbix_zip_archive(pbix_file_path, current_model_output_dir, model_name_from_pbix, current_timestamp)
+    # The exports are independent (each writes its own file and only reads the DataFrames/diff),
+    # so they run concurrently: their disk writes overlap and xlsxwriter/zlib release the GIL.
+    model_changelog_path = current_model_output_dir / "CHANGELOG.md" # Changelog (specific to this model)
+    queue_changelog_entry(model_changelog_path, model_name_from_pbix, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), model_diff_data)
+    try:
+        with ThreadPoolExecutor(max_workers=_EXPORT_WORKERS) as export_executor:
+            export_futures = [
+                # CSVs
+                export_executor.submit(export_metadata_to_csv, tables_df, fields_df, rels_df, current_model_output_csv_dir, model_name_from_pbix),
+                # Parquet (opt-in, created on demand)
+                export_executor.submit(export_metadata_to_parquet, tables_df, fields_df, rels_df, current_model_output_dir / "parquet", model_name_from_pbix),
+                # Excel
+                export_executor.submit(export_metadata_to_excel, tables_df, fields_df, rels_df, current_model_output_excel_dir, model_name_from_pbix, current_timestamp),
+                # Mermaid ER Diagram
+                export_executor.submit(save_mermaid_er_diagram, tables_df, rels_df, current_model_output_dir, model_name_from_pbix),
+                # Save a copy of the PBIX file (zipped)
+                export_executor.submit(create_pbix_zip_archive, pbix_file_path, current_model_output_dir, model_name_from_pbix, current_timestamp),
+            ]
+            if model_diff_data:
+                # JSON Diff
+                export_futures.append(export_executor.submit(save_diff_to_json, model_diff_data, current_model_output_json_dir, model_name_from_pbix))
+                # Markdown Diff Report
+                export_futures.append(export_executor.submit(save_diff_to_markdown, model_diff_data, current_model_output_dir, model_name_from_pbix))
+            for future in as_completed(export_futures):
+                future.result() # Re-raises any unexpected error from an export task
+    finally:
+        # Written even if an export fails, so the queued entry is not lost (each changelog file written once)
+        flush_changelogs()
 
     # Save a copy of the new database.json for the *next* run (becomes the 'old' model)
     # This should be the *final* step for database.json handling for the current run.
     # The new database.json (which was in _temp_extraction/Model/database.json)
     # needs to be copied to current_model_output_dir/database.json
     final_database_json_path_for_run = current_model_output_dir / "database.json"
+    if old_model_future is not None:
+        # The previous model's parse may still hold this file open (or memory-mapped),
+        # which makes the replace fail on Windows
+        wait([old_model_future])
     try:
-        shutil.copy2(extracted_new_model_file_path, final_database_json_path_for_run)
+        # The temporary extraction folder is removed below, so move the file instead of copying it
+        os.replace(extracted_new_model_file_path, final_database_json_path_for_run)
         logger.info(f"Updated current model state to {final_database_json_path_for_run} for next run.")
     except Exception as e:
         logger.error(f"Failed to copy new database.json to output directory: {e}")
@@ -266,7 +304,7 @@ def main_workflow():
         # Ensure we are in the correct directory for Git operations if git_repo_path is different from PROJECT_ROOT
         # The _run_git_command_wrapper already takes working_dir
         
-        commit_prefix = config.get("git_config", {}).get("commit_prefix", "[AUTO] PBI model update")
+        commit_prefix = git_config.get("commit_prefix", "[AUTO] PBI model update")
         commit_msg = f"{commit_prefix}: {model_name_from_pbix} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
         
         # Before committing, ensure the .git directory is at git_repo_path, not inside model_name_from_pbix subdir
@@ -285,9 +323,29 @@ def main_workflow():
     print("✅ All operations completed successfully.")
     print("💤 Bye Bye!")
 
+def render_changelogs_workflow():
+    """Renders CHANGELOG.md from CHANGELOG.jsonl for every model in the output folder (--render-changelog)."""
+    config_file_path = PROJECT_ROOT / "config.yaml"
+    try:
+        load_app_config(config_file_path)
+    except Exception as e:
+        print(f"ERROR: Failed to load configuration. Exiting. Details: {e}", file=sys.stderr)
+        sys.exit(1)
+    config = get_config()
+    setup_logging(log_level=config.get("log_level", "INFO"))
+    rendered = render_changelogs(config["base_output_root"])
+    get_logger(__name__).info(f"Rendered {rendered} changelog(s) under {config['base_output_root']}.")
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extracts, diffs and versions the model of the open Power BI Desktop session.")
+    parser.add_argument("--render-changelog", action="store_true",
+                        help="Render CHANGELOG.md from CHANGELOG.jsonl (changelog_format 'jsonl') for every model in the output folder, then exit.")
+    args = parser.parse_args()
     try:
-        main_workflow()
+        if args.render_changelog:
+            render_changelogs_workflow()
+        else:
+            main_workflow()
     except SystemExit: # Allow sys.exit() to terminate cleanly
         pass
     except Exception as e:
@@ -2,111 +2,281 @@
 
 """Manages the creation and updating of changelog files."""
 
+import json
+import os
+import shutil
+import tempfile
+import threading
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, BinaryIO, Dict, List, Sequence, Tuple
 
 from .logger_setup import get_logger
-from .config_manager import get_config
+from .config_manager import get_output_elements
 from .file_exporters import generate_diff_markdown # Assuming this can be used for changelog entry
 
 logger = get_logger(__name__)
 
-def update_changelog_file(changelog_path: Path, model_name: str, current_datetime_str: str, diff_data: Dict[str, List[Any]] | None) -> None:
-    """Creates or updates the changelog.md file for the model.
+_ENTRY_MARKER = b"## Updated Version at"
+_SCAN_CHUNK_SIZE = 1 << 12  # The file header is short: the first read almost always contains the first entry
+_COPY_BUFFER_SIZE = 1 << 20
 
-    Args:
-        changelog_path (Path): The path to the changelog.md file.
-        model_name (str): The name of the Power BI model.
-        current_datetime_str (str): The current date and time as a string for the entry.
-        diff_data (Dict[str, List[Any]] | None): The diff dictionary. If None, indicates no diff was performed or available.
+def _read_changelog_header(src: BinaryIO) -> Tuple[bytes, bool]:
+    """Reads the changelog header, i.e. everything before the first entry marker.
+
+    Only the header is read; on return ``src`` is positioned at the first entry (if any).
+
+    Returns:
+        Tuple[bytes, bool]: The header bytes and whether an entry marker was found.
     """
-    config = get_config()
-    if not config.get("output_elements", {}).get("save_changelog", True):
-        logger.info(f"Changelog update is disabled in configuration for {model_name}.")
-        return
+    head = b""
+    while True:
+        chunk = src.read(_SCAN_CHUNK_SIZE)
+        # Resume the search just before the new chunk so a marker split across reads is still found
+        search_from = max(0, len(head) - len(_ENTRY_MARKER))
+        head += chunk
+        if head.startswith(_ENTRY_MARKER):
+            marker_index = 0
+        else:
+            marker_index = head.find(b"\n" + _ENTRY_MARKER, search_from)
+            if marker_index != -1:
+                marker_index += 1 # Keep the newline in the header
+        if marker_index != -1:
+            src.seek(marker_index)
+            return head[:marker_index], True
+        if not chunk:
+            return head, False
+
+def _encode_text(text: str) -> bytes:
+    """Encodes changelog text with the platform's line endings, as the text-mode writes did (CRLF on Windows)."""
+    return text.replace("\n", os.linesep).encode("utf-8")
+
+def _atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Writes a small file through a temporary sibling that atomically replaces it."""
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+    try:
+        view = memoryview(data)
+        while view: # os.write may write less than requested
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, path)
+
+def _prepend_changelog_entry(changelog_path: Path, canonical_header: str, new_entry_content: str) -> None:
+    """Inserts a new entry between the changelog header and the existing entries.
+
+    The previous entries are streamed as raw bytes into a temporary file that then
+    atomically replaces the changelog, so they are never decoded or held in memory.
+    """
+    with open(changelog_path, "rb") as src:
+        header, has_entries = _read_changelog_header(src)
+        # Ensure the header is well-formed or use the canonical one if it's empty/whitespace
+        if not header.strip():
+            header = _encode_text(canonical_header)
+        elif not header.endswith((b"\n\n", b"\r\n\r\n")):
+            # Only the missing separator is added: the header's own line endings are kept
+            header = header.rstrip(b"\r\n") + _encode_text("\n\n")
 
-    logger.info(f"Updating changelog for {model_name} at {changelog_path}...")
+        with tempfile.NamedTemporaryFile(dir=changelog_path.parent, prefix=f".{changelog_path.name}.", suffix=".tmp", delete=False) as tmp:
+            try:
+                tmp.write(header)
+                tmp.write(_encode_text(new_entry_content))
+                if has_entries:
+                    shutil.copyfileobj(src, tmp, _COPY_BUFFER_SIZE)
+                # NamedTemporaryFile creates the file as 0600: keep the changelog's own permissions
+                shutil.copymode(changelog_path, tmp.name)
+            except BaseException:
+                tmp.close()
+                os.unlink(tmp.name)
+                raise
+    os.replace(tmp.name, changelog_path)
 
-    # 1. Prepare the new entry content block
-    new_entry_parts: List[str] = []
-    new_entry_parts.append(f"## Updated Version at {current_datetime_str}\n")
-    # new_entry_parts.append("### Datamodel\n") # This seems redundant if changes are listed below
+def is_changelog_enabled() -> bool:
+    """Returns whether changelog updates are enabled (output_elements.save_changelog)."""
+    return bool(get_output_elements().get("save_changelog", True))
 
-    if diff_data:
+def _build_changelog_entry(current_datetime_str: str, diff_data: Dict[str, Sequence[Any]] | None) -> str:
+    """Formats one '## Updated Version at' entry for the given diff."""
+    if not diff_data:
+        entry_body = "Initial version or no comparison data available.\n\n"
+    elif not any(diff_data.values()):
+        # Every added/removed list is empty (the common case for scheduled re-extracts): no Markdown to render
+        entry_body = "No significant changes detected in the schema compared to the previous version.\n\n"
+    else:
         # Generate diff markdown without the main "# Model Diff Report" header
         diff_md_for_changelog = generate_diff_markdown(diff_data, include_header=False)
-        
-        if diff_md_for_changelog.strip() and "No changes detected" not in diff_md_for_changelog:
-            new_entry_parts.append("### Changes Summary\n")
-            new_entry_parts.append(diff_md_for_changelog)
-            # Ensure diff_md_for_changelog ends with a blank line for separation
-            if not diff_md_for_changelog.endswith("\n\n"):
-                if diff_md_for_changelog.endswith("\n"):
-                    new_entry_parts.append("\n")
-                else:
-                    new_entry_parts.append("\n\n")
-        else:
-            new_entry_parts.append("No significant changes detected in the schema compared to the previous version.\n\n")
-    else:
-        new_entry_parts.append("Initial version or no comparison data available.\n\n")
-    
-    new_entry_content = "".join(new_entry_parts)
+        # Normalized to end with exactly one blank line for separation
+        entry_body = "### Changes Summary\n" + diff_md_for_changelog.rstrip("\n") + "\n\n"
+
+    return f"## Updated Version at {current_datetime_str}\n{entry_body}"
 
-    # 2. Define the static header for the current model's changelog
-    # This header will be at the top of the specific model's changelog file.
-    changelog_file_header = (
+def _changelog_file_header(model_name: str) -> str:
+    """Returns the static header at the top of a model's changelog file."""
+    return (
         f"# 🛠 Changelog - {model_name}\n\n"
         "This changelog tracks changes to the Power BI model schema. "
         "Each entry below summarizes additions and removals of tables, fields, "
         "and relationships as of the timestamped update.\n\n"
     )
 
+def _write_changelog_entries(changelog_path: Path, model_name: str, entries: List[str]) -> None:
+    """Writes entries (oldest first) to a changelog, touching the file exactly once.
+
+    Args:
+        changelog_path (Path): The path to the changelog.md file.
+        model_name (str): The name of the Power BI model.
+        entries (List[str]): Formatted entries in the order they were produced.
+    """
+    # "newest_first" prepends (rewrites the file), "oldest_first" appends (writes only the new entries)
+    changelog_order = get_output_elements().get("changelog_order", "newest_first")
+    ordered_entries = "".join(entries if changelog_order == "oldest_first" else reversed(entries))
+
+    changelog_file_header = _changelog_file_header(model_name)
+
     try:
         changelog_path.parent.mkdir(parents=True, exist_ok=True)
 
         if not changelog_path.exists():
             # For a new file, it's the model-specific header + first entry
-            final_content_to_write = changelog_file_header + new_entry_content
-            changelog_path.write_text(final_content_to_write, encoding="utf-8")
+            final_content_to_write = changelog_file_header + ordered_entries
+            _atomic_write_bytes(changelog_path, _encode_text(final_content_to_write))
             logger.info(f"Changelog created for {model_name} with the first entry.")
+        elif changelog_order == "oldest_first":
+            # Append-only layout: the new entries go at the end, existing content is never read back
+            with open(changelog_path, "ab") as f:
+                f.write(_encode_text(ordered_entries))
+            logger.info(f"Changelog updated for {model_name} (entry appended).")
         else:
-            existing_full_content = changelog_path.read_text(encoding="utf-8")
-            existing_lines = existing_full_content.splitlines(keepends=True)
-            
-            # Find where the actual entries start (after the main header)
-            first_entry_marker_line_index = -1
-            for i, line_content in enumerate(existing_lines):
-                if line_content.startswith("## Updated Version at"):
-                    first_entry_marker_line_index = i
-                    break
-            
-            current_file_header_part = ""
-            previous_entries_part = ""
-
-            if first_entry_marker_line_index != -1:
-                # Existing entries found. Content before this is the file's current header.
-                current_file_header_part = "".join(existing_lines[:first_entry_marker_line_index])
-                previous_entries_part = "".join(existing_lines[first_entry_marker_line_index:])
-                
-                # Ensure the identified header part is well-formed or use the canonical one if it's empty/whitespace.
-                if not current_file_header_part.strip(): 
-                     current_file_header_part = changelog_file_header
-                elif not current_file_header_part.endswith("\n\n"): # Ensure it ends with a double newline
-                    current_file_header_part = current_file_header_part.rstrip() + "\n\n"
-            else:
-                # No "## Updated Version at" lines found. File might be header-only, empty, or malformed.
-                current_file_header_part = existing_full_content
-                if not current_file_header_part.strip(): # If existing file is effectively empty
-                    current_file_header_part = changelog_file_header 
-                else: # Presumed to be a header. Ensure it ends with \n\n.
-                    if not current_file_header_part.endswith("\n\n"):
-                        current_file_header_part = current_file_header_part.rstrip() + "\n\n"
-                # previous_entries_part remains empty as no old entries were identified by marker
-            
-            # Prepend the new entry before previous entries
-            final_content_to_write = current_file_header_part + new_entry_content + previous_entries_part
-            changelog_path.write_text(final_content_to_write, encoding="utf-8")
+            _prepend_changelog_entry(changelog_path, changelog_file_header, ordered_entries)
             logger.info(f"Changelog updated for {model_name}.")
 
     except Exception as e:
-        logger.error(f"Failed to update changelog {changelog_path} for model {model_name}: {e}")
\ No newline at end of file
+        logger.error(f"Failed to update changelog {changelog_path} for model {model_name}: {e}")
+
+def _append_changelog_record(jsonl_path: Path, current_datetime_str: str, diff_data: Dict[str, Sequence[Any]] | None) -> None:
+    """Appends one {"ts", "diff"} JSON line to a changelog record file."""
+    logger.info(f"Appending changelog record to {jsonl_path}...")
+    try:
+        jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+        record = json.dumps({"ts": current_datetime_str, "diff": diff_data}, ensure_ascii=False) + "\n"
+        with open(jsonl_path, "ab") as f:
+            f.write(record.encode("utf-8"))
+    except Exception as e:
+        logger.error(f"Failed to append changelog record to {jsonl_path}: {e}")
+
+def _entries_older_than(markdown_path: Path, first_record_ts: str | None) -> List[str]:
+    """Returns the entries of an existing Markdown changelog dated before first_record_ts, in file order.
+
+    These were written before the switch to changelog_format 'jsonl' and exist nowhere else;
+    later entries were rendered from the records and are rendered again. With no record
+    (first_record_ts None) every entry is kept.
+    """
+    try:
+        content = markdown_path.read_bytes().decode("utf-8").replace("\r\n", "\n")
+    except FileNotFoundError:
+        return []
+    marker = _ENTRY_MARKER.decode("utf-8")
+    entries = []
+    for block in ("\n" + content).split("\n" + marker)[1:]:
+        entry_ts = block.split("\n", 1)[0].strip()
+        if first_record_ts is None or entry_ts < first_record_ts: # Timestamps are "%Y-%m-%d %H:%M:%S": string order is time order
+            entries.append(marker + block.rstrip("\n") + "\n\n")
+    return entries
+
+def render_changelog_markdown(jsonl_path: Path, markdown_path: Path, model_name: str, newest_first: bool = True) -> None:
+    """Renders a Markdown changelog from the records written with changelog_format 'jsonl'.
+
+    Entries already in markdown_path that are older than the first record (the history
+    from before the switch to 'jsonl') are kept after (newest_first) or before the rendered ones.
+
+    Args:
+        jsonl_path (Path): The CHANGELOG.jsonl record file.
+        markdown_path (Path): The Markdown file to (over)write.
+        model_name (str): The name of the Power BI model, used in the header.
+        newest_first (bool): Whether the most recent entry comes first. Defaults to True.
+    """
+    entries: List[str] = []
+    first_record_ts: str | None = None
+    with open(jsonl_path, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if first_record_ts is None:
+                first_record_ts = record.get("ts", "")
+            diff_data = record.get("diff")
+            if diff_data:
+                # JSON turns the (table, field) and relationship tuples into lists
+                diff_data = {key: [tuple(item) if isinstance(item, list) else item for item in items] for key, items in diff_data.items()}
+            entries.append(_build_changelog_entry(record.get("ts", ""), diff_data))
+    older_entries = _entries_older_than(markdown_path, first_record_ts)
+    if newest_first:
+        entries.reverse()
+        # Entries are kept in file order, which for a newest_first changelog is already newest first
+        entries.extend(older_entries)
+    else:
+        entries[:0] = older_entries
+    markdown_path.parent.mkdir(parents=True, exist_ok=True)
+    _atomic_write_bytes(markdown_path, _encode_text(_changelog_file_header(model_name) + "".join(entries)))
+    logger.info(f"Rendered {len(entries)} changelog entries from {jsonl_path} to {markdown_path}.")
+
+def render_changelogs(output_root: Path) -> int:
+    """Renders CHANGELOG.md from CHANGELOG.jsonl for every model folder under output_root.
+
+    This is the on-demand step of changelog_format 'jsonl' (main.py --render-changelog);
+    the entry order follows output_elements.changelog_order.
+
+    Args:
+        output_root (Path): The base output folder, holding one folder per model.
+
+    Returns:
+        int: The number of changelogs rendered.
+    """
+    newest_first = get_output_elements().get("changelog_order", "newest_first") != "oldest_first"
+    rendered = 0
+    for jsonl_path in sorted(output_root.glob("*/CHANGELOG.jsonl")):
+        try:
+            render_changelog_markdown(jsonl_path, jsonl_path.with_suffix(".md"), jsonl_path.parent.name, newest_first=newest_first)
+            rendered += 1
+        except Exception as e:
+            logger.error(f"Failed to render changelog from {jsonl_path}: {e}")
+    return rendered
+
+# Entries queued per changelog file, written by flush_changelogs: path -> (model name, entries oldest first)
+_PENDING_ENTRIES: Dict[Path, Tuple[str, List[str]]] = {}
+_PENDING_LOCK = threading.Lock()
+
+def queue_changelog_entry(changelog_path: Path, model_name: str, current_datetime_str: str, diff_data: Dict[str, Sequence[Any]] | None) -> None:
+    """Queues a changelog entry; nothing is written until flush_changelogs() is called.
+
+    Batching lets a run that updates several models (or one model several times)
+    rewrite each changelog only once. With changelog_format 'jsonl' the record is
+    appended right away instead.
+
+    Args:
+        changelog_path (Path): The path to the changelog.md file.
+        model_name (str): The name of the Power BI model.
+        current_datetime_str (str): The current date and time as a string for the entry.
+        diff_data (Dict[str, Sequence[Any]] | None): The diff dictionary. If None, indicates no diff was performed or available.
+    """
+    if not get_output_elements().get("save_changelog", True):
+        logger.info(f"Changelog update is disabled in configuration for {model_name}.")
+        return
+    if get_output_elements().get("changelog_format", "markdown") == "jsonl":
+        # A record is a single short append: nothing to batch
+        _append_changelog_record(changelog_path.with_suffix(".jsonl"), current_datetime_str, diff_data)
+        return
+
+    entry = _build_changelog_entry(current_datetime_str, diff_data)
+    with _PENDING_LOCK:
+        _PENDING_ENTRIES.setdefault(changelog_path, (model_name, []))[1].append(entry)
+
+def flush_changelogs() -> None:
+    """Writes all queued changelog entries, each changelog file in a single pass."""
+    with _PENDING_LOCK:
+        pending = dict(_PENDING_ENTRIES)
+        _PENDING_ENTRIES.clear()
+
+    for changelog_path, (model_name, entries) in pending.items():
+        logger.info(f"Updating changelog for {model_name} at {changelog_path} ({len(entries)} queued entries)...")
+        _write_changelog_entries(changelog_path, model_name, entries)
@@ -2,56 +2,107 @@
 
 """Command Line Interface (CLI) utility functions."""
 
+import os
 import subprocess
 import sys
+import threading
+from collections import deque
 from pathlib import Path
-from typing import List, Any, Dict
+from typing import List, Any, Deque, Dict, TextIO
 
 from .logger_setup import get_logger
-# Import get_config after it's defined and loaded to avoid circular dependency issues at import time
-# from .config_manager import get_config 
+# config_manager imports nothing from this package, so a module-level import is not circular
+from .config_manager import get_config
 
 logger = get_logger(__name__)
 
-def run_command(cmd: List[str | Path], verbose: bool | None = None, cwd: Path | None = None) -> subprocess.CompletedProcess[str]:
+# Lines of each stream kept by streaming commands (for the returned result and error messages)
+_STREAM_TAIL_LINES = 4096
+
+def _drain_stream(stream: TextIO, tail: Deque[str], stream_name: str, verbose: bool) -> None:
+    """Reads a command's output line by line, keeping only the last lines in memory."""
+    with stream:
+        for line in stream:
+            line = line.rstrip("\n")
+            tail.append(line)
+            if verbose:
+                logger.debug("Command %s: %s", stream_name, line)
+
+def _run_streaming(cmd_str_list: List[str], verbose: bool, cwd: Path | None, check: bool, env: Dict[str, str] | None) -> subprocess.CompletedProcess[str]:
+    """Runs a command while draining stdout/stderr as they are produced.
+
+    Output is logged per line when verbose and only the last _STREAM_TAIL_LINES lines
+    of each stream are kept, so memory stays bounded however much the command prints.
+    """
+    stdout_tail: Deque[str] = deque(maxlen=_STREAM_TAIL_LINES)
+    stderr_tail: Deque[str] = deque(maxlen=_STREAM_TAIL_LINES)
+    with subprocess.Popen(
+        cmd_str_list,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding='utf-8',
+        bufsize=1, # Line buffered
+        cwd=cwd,
+        env={**os.environ, **env} if env else None,
+    ) as popen:
+        # stderr is drained on a helper thread so neither pipe can fill up and block the command
+        stderr_thread = threading.Thread(target=_drain_stream, args=(popen.stderr, stderr_tail, "stderr", verbose), daemon=True)
+        stderr_thread.start()
+        _drain_stream(popen.stdout, stdout_tail, "stdout", verbose)
+        stderr_thread.join()
+        returncode = popen.wait()
+
+    stdout = "\n".join(stdout_tail)
+    stderr = "\n".join(stderr_tail)
+    if check and returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd_str_list, output=stdout, stderr=stderr)
+    return subprocess.CompletedProcess(cmd_str_list, returncode, stdout, stderr)
+
+def run_command(cmd: List[str | Path], verbose: bool | None = None, cwd: Path | None = None, check: bool = True, env: Dict[str, str] | None = None, capture: bool = True) -> subprocess.CompletedProcess[str]:
     """Runs an external command and handles output/errors.
 
     Args:
         cmd (List[str  |  Path]): The command and its arguments.
         verbose (bool | None): If True, prints stdout/stderr. If None, uses verbose from config.
         cwd (Path | None): The working directory for the command. Defaults to None (current directory).
+        check (bool): If True, a non-zero exit code raises CalledProcessError. If False, the
+            result is returned and the caller inspects its returncode. Defaults to True.
+        env (Dict[str, str] | None): Extra environment variables, added on top of the current environment.
+        capture (bool): If True, the full stdout/stderr are captured and returned. If False, output is
+            streamed line by line (logged when verbose) and the result only holds the last lines of
+            each stream; use it for long-running commands whose output is not parsed. Defaults to True.
 
     Returns:
         subprocess.CompletedProcess[str]: The result of the command execution.
 
     Raises:
-        subprocess.CalledProcessError: If the command returns a non-zero exit code.
+        subprocess.CalledProcessError: If check is True and the command returns a non-zero exit code.
         FileNotFoundError: If the command executable is not found.
     """
-    # This import is deferred to runtime to ensure config is loaded.
-    from .config_manager import get_config
-    config = get_config()
-
     if verbose is None:
-        verbose = config.get("verbose", False)
+        verbose = get_config().get("verbose", False)
 
     cmd_str_list = [str(c) for c in cmd]
     logger.info(f"Executing command: {' '.join(cmd_str_list)}")
 
     try:
+        if not capture:
+            return _run_streaming(cmd_str_list, verbose, cwd, check, env)
         # Using text=True (universal_newlines=True) and specifying encoding
         proc = subprocess.run(
             cmd_str_list,
             text=True,
-            check=True, # Raises CalledProcessError for non-zero exit codes
+            check=check, # Raises CalledProcessError for non-zero exit codes
             capture_output=True, # Captures stdout and stderr
             encoding='utf-8', # Specify encoding for text mode
-            cwd=cwd # Pass the working directory
+            cwd=cwd, # Pass the working directory
+            env={**os.environ, **env} if env else None,
         )
         if proc.stdout and verbose:
-            logger.debug(f"Command stdout: {proc.stdout.strip()}")
+            logger.debug("Command stdout: %s", proc.stdout.strip())
         if proc.stderr and verbose: # Stderr might contain warnings even on success
-            logger.debug(f"Command stderr: {proc.stderr.strip()}")
+            logger.debug("Command stderr: %s", proc.stderr.strip())
         return proc
     except subprocess.CalledProcessError as e:
         logger.error(f"Error during command execution: {' '.join(cmd_str_list)}")
@@ -6,14 +6,48 @@ import os
 from pathlib import Path
 import yaml
 from dotenv import load_dotenv
-from typing import Any, Dict, List, Set, Tuple
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Set, Tuple
+
+try:
+    from yaml import CSafeLoader as _YamlLoader  # libyaml bindings: C parser
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
 
 # Global config dictionary, to be loaded by load_app_config
 APP_CONFIG = {}
+# Read-only view of APP_CONFIG handed out by get_config (created once per load, no copies)
+_APP_CONFIG_VIEW: Mapping[str, Any] = MappingProxyType(APP_CONFIG)
+
+# Default values for output_elements if not specified
+_DEFAULT_OUTPUT_ELEMENTS: Mapping[str, Any] = MappingProxyType({
+    "save_csv": True,
+    "csv_engine": "pandas",
+    "save_parquet": False,
+    "save_excel": True,
+    "save_json_diff": True,
+    "save_markdown_diff": True,
+    "save_mermaid_er": True,
+    "save_changelog": True,
+    "changelog_order": "newest_first",
+    "changelog_format": "markdown",
+    "save_database_copy": True,
+    "save_pbix_zip": False,
+    "archive_format": "stored",
+})
+
+# Default values for git_config if not specified
+_DEFAULT_GIT_CONFIG: Mapping[str, Any] = MappingProxyType({
+    "enabled": False,
+    "remote_url": "",
+    "branch": "main",
+    "commit_prefix": "[AUTO] PBI model update",
+    "remote_name": "origin",
+})
 
 def load_app_config(config_path: Path = Path("config.yaml")) -> Dict[str, Any]:
     """Loads configuration from config.yaml and .env, then populates APP_CONFIG."""
-    global APP_CONFIG
+    global APP_CONFIG, _APP_CONFIG_VIEW
 
     # Load .env first to make environment variables available for config.yaml if needed
     load_dotenv()
@@ -21,8 +55,8 @@ def load_app_config(config_path: Path = Path("config.yaml")) -> Dict[str, Any]:
     if not config_path.is_file():
         raise FileNotFoundError(f"Configuration file not found: {config_path}")
 
-    with open(config_path, "r", encoding="utf-8") as f:
-        config_from_yaml = yaml.safe_load(f)
+    # Read once and parse from memory; the loader is the safe one, with libyaml when available
+    config_from_yaml = yaml.load(config_path.read_bytes(), Loader=_YamlLoader)
 
     # SCRIPT_DIR will be set in the main script or a higher-level module
     # For now, assume it's the parent of the config_path's parent if not otherwise defined
@@ -50,39 +84,23 @@ def load_app_config(config_path: Path = Path("config.yaml")) -> Dict[str, Any]:
         "git_token": os.getenv("GIT_TOKEN"),
     }
 
-    # Default values for output_elements if not specified
-    default_output_elements = {
-        "save_csv": True,
-        "save_excel": True,
-        "save_json_diff": True,
-        "save_markdown_diff": True,
-        "save_mermaid_er": True,
-        "save_changelog": True,
-        "save_database_copy": True,
-        "save_pbix_zip": False,
-    }
-    for key, default_value in default_output_elements.items():
-        APP_CONFIG["output_elements"].setdefault(key, default_value)
-
-    # Default values for git_config if not specified
-    default_git_config = {
-        "enabled": False,
-        "remote_url": "",
-        "branch": "main",
-        "commit_prefix": "[AUTO] PBI model update",
-        "remote_name": "origin",
-    }
-    for key, default_value in default_git_config.items():
-        APP_CONFIG["git_config"].setdefault(key, default_value)
+    # Default values for output_elements/git_config if not specified (user values win)
+    APP_CONFIG["output_elements"] = {**_DEFAULT_OUTPUT_ELEMENTS, **APP_CONFIG["output_elements"]}
+    APP_CONFIG["git_config"] = {**_DEFAULT_GIT_CONFIG, **APP_CONFIG["git_config"]}
 
+    _APP_CONFIG_VIEW = MappingProxyType(APP_CONFIG)
     return APP_CONFIG
 
-def get_config() -> Dict[str, Any]:
-    """Returns the loaded application configuration."""
+def get_config() -> Mapping[str, Any]:
+    """Returns a read-only view of the loaded application configuration."""
     if not APP_CONFIG:
         # Attempt to load with default path if not already loaded.
         # This might be called before explicit loading in some contexts (e.g. module import)
         # Consider if this implicit loading is desired or if an error should be raised.
         # For now, let's assume the main script will call load_app_config().
         raise RuntimeError("Configuration has not been loaded. Call load_app_config() first.")
-    return APP_CONFIG
\ No newline at end of file
+    return _APP_CONFIG_VIEW
+
+def get_output_elements() -> Mapping[str, Any]:
+    """Returns the output_elements section of the loaded configuration, defaults included."""
+    return get_config()["output_elements"]
\ No newline at end of file
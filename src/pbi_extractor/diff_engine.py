@@ -2,97 +2,137 @@
 
 """Compares two Power BI models and identifies structural differences."""
 
-from typing import Any, Dict, List, Set, Tuple
+from itertools import chain
+from operator import itemgetter
+from typing import Any, Dict, FrozenSet, List, Set, Tuple
 
 from .logger_setup import get_logger
 
 logger = get_logger(__name__)
 
-def diff_models(old_model: Dict[str, Any] | None, new_model: Dict[str, Any] | None) -> Dict[str, List[Any]] | None:
+# Keys identifying a relationship; itemgetter builds the identity tuple in one C call
+_RELATIONSHIP_KEYS = ("fromTable", "fromColumn", "toTable", "toColumn")
+_relationship_identity = itemgetter(*_RELATIONSHIP_KEYS)
+
+def empty_diff() -> Dict[str, Tuple[Any, ...]]:
+    """Returns a diff result with every section empty (the result for two identical models).
+
+    Returns:
+        Dict[str, Tuple[Any, ...]]: A dictionary with empty added/removed tuples for each section.
+    """
+    return {
+        "tables_added": (),
+        "tables_removed": (),
+        "fields_added": (),
+        "fields_removed": (),
+        "relations_added": (),
+        "relations_removed": (),
+        # TODO: Consider adding modified items as well (e.g., field data type change)
+    }
+
+def _split_symmetric_difference(old_set: Set[Any], new_set: Set[Any]) -> Tuple[Tuple[Any, ...], Tuple[Any, ...]]:
+    """Splits the items present in only one of the sets into sorted (added, removed) tuples.
+
+    A single walk over ``old_set ^ new_set`` replaces the two set differences.
+    """
+    added: List[Any] = []
+    removed: List[Any] = []
+    for item in old_set ^ new_set:
+        (added if item in new_set else removed).append(item)
+    added.sort()
+    removed.sort()
+    return tuple(added), tuple(removed)
+
+# Shared default for missing list keys (models are validated at load time, see validate_model)
+_EMPTY: Tuple[Any, ...] = ()
+
+def _gather_field_names_by_table(model_dict: Dict[str, Any]) -> Dict[str, FrozenSet[str]]:
+    fields_by_table: Dict[str, FrozenSet[str]] = {}
+    for table_data in model_dict.get("tables", _EMPTY):
+        table_name = table_data.get("name")
+        if not table_name:
+            continue
+        # A sized list lets frozenset() allocate its table once instead of growing while consuming a generator
+        names = [f["name"] for f in chain(table_data.get("columns", _EMPTY), table_data.get("measures", _EMPTY)) if "name" in f]
+        previous_names = fields_by_table.get(table_name)
+        fields_by_table[table_name] = frozenset(names) if previous_names is None else previous_names.union(names)
+    return fields_by_table
+
+def _gather_relationships_from_model(model_dict: Dict[str, Any]) -> FrozenSet[Tuple[str, str, str, str]]:
+    rel_set: Set[Tuple[str, str, str, str]] = set()
+    for rel_data in model_dict.get("relationships", _EMPTY):
+        try:
+            rel_set.add(_relationship_identity(rel_data))
+        except KeyError:
+            # One of the key fields for a relationship's identity is missing
+            logger.warning("Skipping malformed relationship in model: %s", rel_data)
+    return frozenset(rel_set)
+
+_ModelKeys = Tuple[FrozenSet[str], Dict[str, FrozenSet[str]], FrozenSet[Tuple[str, str, str, str]]]
+
+def _model_keys(model_dict: Dict[str, Any]) -> _ModelKeys:
+    """Returns the (table names, field names by table, relationship identities) of a model."""
+    return (
+        frozenset(t["name"] for t in model_dict.get("tables", _EMPTY) if "name" in t),
+        _gather_field_names_by_table(model_dict),
+        _gather_relationships_from_model(model_dict),
+    )
+
+def diff_models(old_model: Dict[str, Any] | None, new_model: Dict[str, Any] | None) -> Dict[str, Tuple[Any, ...]] | None:
     """Compares two model dicts and returns structural differences.
 
+    Both models are expected to have passed metadata_parser.validate_model (load_model_from_json
+    does this), so their list-valued keys are iterated without per-access type checks.
+
     Args:
         old_model (Dict[str, Any] | None): The old model dictionary (from database.json).
         new_model (Dict[str, Any] | None): The new model dictionary (from database.json).
 
     Returns:
-        Dict[str, List[Any]] | None: A dictionary containing lists of added/removed items,
+        Dict[str, Tuple[Any, ...]] | None: A dictionary containing sorted tuples of added/removed items,
                                      or None if either model is not provided.
     """
     if old_model is None or new_model is None:
         logger.warning("Cannot diff models: one or both models are missing.")
         return None
 
-    logger.info("Starting model diff process...")
+    if old_model is new_model:
+        # Same parsed model passed twice: nothing can differ
+        logger.info("Old and new model are the same object, skipping diff.")
+        return empty_diff()
 
-    diff_results: Dict[str, List[Any]] = {
-        "tables_added": [],
-        "tables_removed": [],
-        "fields_added": [],
-        "fields_removed": [],
-        "relations_added": [],
-        "relations_removed": [],
-        # TODO: Consider adding modified items as well (e.g., field data type change)
-    }
+    logger.info("Starting model diff process...")
 
-    # Helper to safely get list of items from model
-    def _get_items(model_dict: Dict[str, Any], key: str) -> List[Dict[str, Any]]:
-        items = model_dict.get(key, [])
-        if not isinstance(items, list):
-            logger.warning(f"Expected list for key '{key}' in model, got {type(items)}. Treating as empty.")
-            return []
-        return items
+    diff_results: Dict[str, Tuple[Any, ...]] = empty_diff()
+    old_tables_set, old_fields_by_table, old_relationships_set = _model_keys(old_model)
+    new_tables_set, new_fields_by_table, new_relationships_set = _model_keys(new_model)
 
     # 1. Compare Tables
-    old_tables_set = {t["name"] for t in _get_items(old_model, "tables") if "name" in t}
-    new_tables_set = {t["name"] for t in _get_items(new_model, "tables") if "name" in t}
-
-    diff_results["tables_added"] = sorted(list(new_tables_set - old_tables_set))
-    diff_results["tables_removed"] = sorted(list(old_tables_set - new_tables_set))
+    diff_results["tables_added"], diff_results["tables_removed"] = _split_symmetric_difference(old_tables_set, new_tables_set)
 
     # 2. Compare Fields (Columns and Measures)
-    def gather_fields_from_model(model_dict: Dict[str, Any]) -> Set[Tuple[str, str]]:
-        field_set: Set[Tuple[str, str]] = set()
-        for table_data in _get_items(model_dict, "tables"):
-            table_name = table_data.get("name")
-            if not table_name:
-                continue
-            for column_data in _get_items(table_data, "columns"):
-                if "name" in column_data:
-                    field_set.add((table_name, column_data["name"]))
-            for measure_data in _get_items(table_data, "measures"):
-                if "name" in measure_data:
-                    field_set.add((table_name, measure_data["name"]))
-        return field_set
-
-    old_fields_set = gather_fields_from_model(old_model)
-    new_fields_set = gather_fields_from_model(new_model)
-
-    diff_results["fields_added"] = sorted(list(new_fields_set - old_fields_set))
-    diff_results["fields_removed"] = sorted(list(old_fields_set - new_fields_set))
+    # Per-table quick reject: tables whose field names are unchanged (the common case)
+    # cost one set comparison; (table, field) tuples are only built for actual differences.
+    fields_added: List[Tuple[str, str]] = []
+    fields_removed: List[Tuple[str, str]] = []
+    for table_name, new_names in new_fields_by_table.items():
+        old_names = old_fields_by_table.get(table_name, frozenset())
+        if new_names == old_names:
+            continue
+        for name in old_names ^ new_names:
+            (fields_added if name in new_names else fields_removed).append((table_name, name))
+    for table_name, old_names in old_fields_by_table.items():
+        if table_name not in new_fields_by_table:
+            fields_removed.extend((table_name, name) for name in old_names)
+
+    fields_added.sort()
+    fields_removed.sort()
+    diff_results["fields_added"] = tuple(fields_added)
+    diff_results["fields_removed"] = tuple(fields_removed)
 
     # 3. Compare Relationships
-    def gather_relationships_from_model(model_dict: Dict[str, Any]) -> Set[Tuple[str, str, str, str]]:
-        rel_set: Set[Tuple[str, str, str, str]] = set()
-        for rel_data in _get_items(model_dict, "relationships"):
-            # Ensure all key fields for a relationship's identity are present
-            if all(k in rel_data for k in ["fromTable", "fromColumn", "toTable", "toColumn"]):
-                rel_set.add((
-                    rel_data["fromTable"],
-                    rel_data["fromColumn"],
-                    rel_data["toTable"],
-                    rel_data["toColumn"],
-                ))
-            else:
-                logger.warning(f"Skipping malformed relationship in model: {rel_data}")
-        return rel_set
-
-    old_relationships_set = gather_relationships_from_model(old_model)
-    new_relationships_set = gather_relationships_from_model(new_model)
-
-    diff_results["relations_added"] = sorted(list(new_relationships_set - old_relationships_set))
-    diff_results["relations_removed"] = sorted(list(old_relationships_set - new_relationships_set))
+    diff_results["relations_added"], diff_results["relations_removed"] = _split_symmetric_difference(old_relationships_set, new_relationships_set)
 
     logger.info("Model diff process completed.")
-    logger.debug(f"Diff results: {diff_results}")
+    logger.debug("Diff results: %s", diff_results) # Lazy: the repr can be huge and is only built at DEBUG
     return diff_results
\ No newline at end of file
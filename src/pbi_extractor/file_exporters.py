@@ -2,71 +2,263 @@
 
 """Handles the generation and saving of various output files (CSV, Excel, JSON, Markdown, Mermaid)."""
 
+import codecs
+import filecmp
+import functools
+import importlib.util
+import io
 import json
+import os
 import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from itertools import zip_longest
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Sequence, TextIO, Tuple
 
 import pandas as pd
-# import xlsxwriter # xlsxwriter will be used by pandas ExcelWriter if installed
+from pandas.api.types import is_numeric_dtype, is_scalar
+
+try:
+    import orjson  # Optional: serializes JSON in C, much faster than the json module
+except ImportError:
+    orjson = None
 
 from .logger_setup import get_logger
-from .config_manager import get_config
+from .config_manager import get_output_elements
 
 logger = get_logger(__name__)
 
+@functools.lru_cache(maxsize=64)
+def _ensure_dir(path: Path) -> None:
+    """Creates an output directory (and its parents), at most once per path per process.
+
+    Every exporter writes into a per-model folder that no one removes during a run,
+    so repeating the mkdir for each export would only repeat the syscalls.
+    """
+    path.mkdir(parents=True, exist_ok=True)
+
+# xlsxwriter streams cells without openpyxl's per-cell style bookkeeping; openpyxl is only a fallback
+_EXCEL_ENGINE = "xlsxwriter" if importlib.util.find_spec("xlsxwriter") else "openpyxl"
+_INVALID_SHEET_CHARS_RE = re.compile(r'[\/*?:[\]]')
+_WRITE_BUFFER_SIZE = 1 << 20  # 1 MiB: large report files are written with few syscalls
+_PARALLEL_CSV_MIN_ROWS = 100_000  # Below this, thread start-up costs more than the overlap saves
+
 
 def export_metadata_to_csv(tables_df: pd.DataFrame, fields_df: pd.DataFrame, rels_df: pd.DataFrame, output_dir: Path, model_name: str) -> None:
     """Exports metadata DataFrames to CSV files in the specified directory."""
-    config = get_config()
-    if not config.get("output_elements", {}).get("save_csv", True):
+    if not get_output_elements().get("save_csv", True):
         logger.info("CSV export is disabled in configuration.")
         return
 
     logger.info(f"Exporting metadata to CSV files in {output_dir} for model '{model_name}'...")
     try:
-        output_dir.mkdir(parents=True, exist_ok=True)
-        tables_df.to_csv(output_dir / f"{model_name}_tables.csv", index=False, encoding='utf-8-sig')
-        fields_df.to_csv(output_dir / f"{model_name}_fields.csv", index=False, encoding='utf-8-sig')
-        rels_df.to_csv(output_dir / f"{model_name}_relationships.csv", index=False, encoding='utf-8-sig')
+        _ensure_dir(output_dir)
+        csv_jobs = [
+            (tables_df, output_dir / f"{model_name}_tables.csv"),
+            (fields_df, output_dir / f"{model_name}_fields.csv"),
+            (rels_df, output_dir / f"{model_name}_relationships.csv"),
+        ]
+        csv_engine = get_output_elements().get("csv_engine", "pandas")
+        if csv_engine == "pyarrow" and _write_csvs_with_pyarrow(csv_jobs, parallel=len(fields_df) > _PARALLEL_CSV_MIN_ROWS):
+            logger.info("CSV files exported successfully (pyarrow).")
+            return
+        for df, csv_path in csv_jobs:
+            df.to_csv(csv_path, index=False, encoding='utf-8-sig')
         logger.info("CSV files exported successfully.")
     except Exception as e:
         logger.error(f"Failed to export metadata to CSV: {e}")
 
+def _write_csvs_with_pyarrow(csv_jobs: List[Tuple[pd.DataFrame, Path]], parallel: bool) -> bool:
+    """Writes DataFrames to CSV with Arrow's multithreaded C++ writer.
+
+    The files keep the UTF-8 BOM of the pandas output, but string values are
+    always quoted and booleans are written as ``true``/``false``. Every frame is
+    converted before the first file is written.
+
+    Args:
+        csv_jobs (List[Tuple[pd.DataFrame, Path]]): The frames and their CSV paths.
+        parallel (bool): Whether to write the files on one thread each.
+
+    Returns:
+        bool: False (nothing written) if pyarrow is not installed or cannot convert a frame,
+            e.g. an object column mixing strings and lists; the caller then uses pandas.
+    """
+    try:
+        import pyarrow as pa
+        from pyarrow import csv as pa_csv
+    except ImportError:
+        logger.warning("csv_engine 'pyarrow' requires the pyarrow package. Falling back to pandas.")
+        return False
+    try:
+        arrow_tables = [pa.Table.from_pandas(df, preserve_index=False) for df, _ in csv_jobs]
+    except pa.ArrowException as e:
+        logger.warning("csv_engine 'pyarrow' cannot convert the metadata (%s). Falling back to pandas.", e)
+        return False
+
+    def write_csv(table: Any, csv_path: Path) -> None:
+        with open(csv_path, "wb") as f:
+            f.write(codecs.BOM_UTF8)
+            pa_csv.write_csv(table, f)
+
+    if parallel:
+        # Arrow's writer runs without the GIL, so threads write the files in parallel
+        with ThreadPoolExecutor(max_workers=len(csv_jobs)) as csv_executor:
+            list(csv_executor.map(write_csv, arrow_tables, [csv_path for _, csv_path in csv_jobs]))
+    else:
+        for table, (_, csv_path) in zip(arrow_tables, csv_jobs):
+            write_csv(table, csv_path)
+    return True
+
+def export_metadata_to_parquet(tables_df: pd.DataFrame, fields_df: pd.DataFrame, rels_df: pd.DataFrame, output_dir: Path, model_name: str) -> None:
+    """Exports metadata DataFrames to zstd-compressed Parquet files in the specified directory.
+
+    Parquet keeps the column types and is much smaller and faster to reload than CSV,
+    which suits later analysis across historical runs. Requires pyarrow.
+    """
+    if not get_output_elements().get("save_parquet", False):
+        logger.info("Parquet export is disabled in configuration.")
+        return
+
+    logger.info(f"Exporting metadata to Parquet files in {output_dir} for model '{model_name}'...")
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        logger.warning("save_parquet requires the pyarrow package. Parquet export skipped.")
+        return
+    try:
+        # Every frame is converted before the first file is written, so a failure leaves no partial set
+        arrow_tables = {
+            kind: pa.Table.from_pandas(_with_text_cells(df), preserve_index=False)
+            for df, kind in ((tables_df, "tables"), (fields_df, "fields"), (rels_df, "relationships"))
+        }
+        _ensure_dir(output_dir)
+        for kind, table in arrow_tables.items():
+            pq.write_table(table, output_dir / f"{model_name}_{kind}.parquet", compression="zstd")
+        logger.info("Parquet files exported successfully.")
+    except Exception as e:
+        logger.error(f"Failed to export metadata to Parquet: {e}")
+
+def _with_text_cells(df: pd.DataFrame) -> pd.DataFrame:
+    """Returns the DataFrame with non-scalar values of object columns as text (see _cell_text).
+
+    Arrow needs one type per column, and a measure expression may mix strings and lists.
+    """
+    text_columns = {
+        col_name: df[col_name].map(lambda value: value if is_scalar(value) else _cell_text(value))
+        for col_name in df.columns[df.dtypes == object]
+    }
+    return df.assign(**text_columns) if text_columns else df
+
+def _cell_text(value: Any) -> str:
+    """Returns a non-scalar cell value as text.
+
+    Lists (multi-line DAX expressions in the Raw serialization) become one element per line;
+    anything else goes through str(), as to_excel does.
+    """
+    if isinstance(value, list):
+        return "\n".join(map(str, value))
+    return str(value)
+
+def _column_values(column: pd.Series, missing: Any = None) -> List[Any]:
+    """Returns a column's values as Python objects, with missing values replaced by ``missing``.
+
+    The dtype is checked once per column: NaN-free numeric columns convert directly, the
+    rest go through object dtype (xlsxwriter rejects NaN, openpyxl would write it as text).
+    """
+    if is_numeric_dtype(column) and not column.hasnans:
+        return column.tolist()
+    values = column.astype(object).where(column.notna(), missing).tolist()
+    if column.dtype == object:
+        # Only object columns can hold lists/dicts (e.g. a measure expression split into lines)
+        values = [value if is_scalar(value) else _cell_text(value) for value in values]
+    return values
+
+def _header_style(writer: pd.ExcelWriter) -> Any:
+    """Returns the header cell style of the writer's engine, created once per workbook.
+
+    Bold, thin-bordered and centered, like the header to_excel writes.
+    """
+    if writer.engine == "xlsxwriter":
+        return writer.book.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+    if writer.engine == "openpyxl":
+        from openpyxl.styles import Alignment, Border, Font, Side
+        thin = Side(style="thin")
+        return (Font(bold=True), Border(left=thin, right=thin, top=thin, bottom=thin), Alignment(horizontal="center", vertical="top"))
+    return None
+
+def _write_df_to_sheet(writer: pd.ExcelWriter, sheet_name: str, df: pd.DataFrame, header_style: Any) -> None:
+    """Writes a DataFrame to a new sheet (styled header row, no index).
+
+    For xlsxwriter and openpyxl the values are written column-wise (write_column) or as
+    plain row tuples (append), bypassing pandas' cell-by-cell ExcelFormatter; other
+    engines go through to_excel.
+
+    Args:
+        writer (pd.ExcelWriter): The open workbook writer.
+        sheet_name (str): Name of the new sheet.
+        df (pd.DataFrame): The data, written without its index.
+        header_style (Any): The workbook's header style, from _header_style(writer).
+    """
+    if writer.engine == "xlsxwriter":
+        worksheet = writer.book.add_worksheet(sheet_name)
+        worksheet.write_row(0, 0, list(df.columns), header_style)
+        for col_idx, col_name in enumerate(df.columns):
+            # Missing values become blank cells, as with to_excel
+            worksheet.write_column(1, col_idx, _column_values(df[col_name]))
+    elif writer.engine == "openpyxl":
+        worksheet = writer.book.create_sheet(sheet_name)
+        worksheet.append(list(df.columns))
+        header_font, header_border, header_alignment = header_style
+        for cell in worksheet[1]:
+            cell.font, cell.border, cell.alignment = header_font, header_border, header_alignment
+        # Missing values as empty strings, the cells to_excel writes for them with openpyxl
+        for row in zip(*[_column_values(df[col_name], missing="") for col_name in df.columns]):
+            worksheet.append(row)
+    else:
+        df.to_excel(writer, sheet_name=sheet_name, index=False)
+
 def export_metadata_to_excel(tables_df: pd.DataFrame, fields_df: pd.DataFrame, rels_df: pd.DataFrame, output_dir: Path, model_name: str, timestamp: str) -> None:
     """Exports metadata to an Excel file with one sheet per table and one for relationships."""
-    config = get_config()
-    if not config.get("output_elements", {}).get("save_excel", True):
+    if not get_output_elements().get("save_excel", True):
         logger.info("Excel export is disabled in configuration.")
         return
+    if tables_df.empty and fields_df.empty and rels_df.empty:
+        # Each run gets its own timestamped workbook, so skipping leaves no stale file behind
+        logger.info("No metadata to write to Excel. Skipping the workbook.")
+        return
 
     excel_file_path = output_dir / f"{model_name}_metadata_{timestamp}.xlsx"
     logger.info(f"Exporting metadata to Excel file: {excel_file_path}...")
     try:
-        output_dir.mkdir(parents=True, exist_ok=True)
-        with pd.ExcelWriter(excel_file_path, engine='xlsxwriter') as writer:
+        _ensure_dir(output_dir)
+        with pd.ExcelWriter(excel_file_path, engine=_EXCEL_ENGINE) as writer:
+            header_style = _header_style(writer)
             # Sheet for relationships
             if not rels_df.empty:
-                rels_df.to_excel(writer, sheet_name="Relationships", index=False)
+                _write_df_to_sheet(writer, "Relationships", rels_df, header_style)
             else:
                 logger.info("No relationships data to write to Excel.")
 
             # Sheet for tables
             if not tables_df.empty:
-                tables_df.to_excel(writer, sheet_name="Tables", index=False)
+                _write_df_to_sheet(writer, "Tables", tables_df, header_style)
             else:
                 logger.info("No Tables data to write to Excel.")
 
             # One sheet for each table with its fields
             if not tables_df.empty and not fields_df.empty:
+                # Partition the fields in a single groupby pass instead of one boolean mask per table
+                fields_by_table = dict(list(fields_df.groupby("table", sort=False, observed=True)))
                 for table_name in tables_df["table_name"].unique():
-                    fields_for_table = fields_df[fields_df["table"] == table_name]
+                    fields_for_table = fields_by_table.get(table_name)
                     # Sanitize sheet name (Excel limit: max 31 chars, no invalid chars)
-                    safe_sheet_name = re.sub(r'[\/*?:[\]]', '_', table_name)[:31]
-                    if not fields_for_table.empty:
-                        fields_for_table.to_excel(writer, sheet_name=safe_sheet_name, index=False)
+                    safe_sheet_name = _INVALID_SHEET_CHARS_RE.sub('_', table_name)[:31]
+                    if fields_for_table is not None:
+                        _write_df_to_sheet(writer, safe_sheet_name, fields_for_table, header_style)
                     else:
-                        logger.debug(f"No fields data for table '{table_name}' to write to Excel.")
+                        logger.debug("No fields data for table '%s' to write to Excel.", table_name)
             elif tables_df.empty:
                 logger.info("No tables data to process for Excel sheets.")
             elif fields_df.empty:
@@ -76,10 +268,9 @@ def export_metadata_to_excel(tables_df: pd.DataFrame, fields_df: pd.DataFrame, r
     except Exception as e:
         logger.error(f"Failed to export metadata to Excel: {e}")
 
-def save_diff_to_json(diff_data: Dict[str, List[Any]], output_dir: Path, model_name: str) -> None:
+def save_diff_to_json(diff_data: Dict[str, Sequence[Any]], output_dir: Path, model_name: str) -> None:
     """Saves the model differences to a JSON file."""
-    config = get_config()
-    if not config.get("output_elements", {}).get("save_json_diff", True):
+    if not get_output_elements().get("save_json_diff", True):
         logger.info("JSON diff export is disabled in configuration.")
         return
 
@@ -90,22 +281,39 @@ def save_diff_to_json(diff_data: Dict[str, List[Any]], output_dir: Path, model_n
     json_file_path = output_dir / f"{model_name}_diff.json"
     logger.info(f"Saving model differences to JSON: {json_file_path}...")
     try:
-        output_dir.mkdir(parents=True, exist_ok=True)
-        with open(json_file_path, "w", encoding="utf-8") as f:
-            json.dump(diff_data, f, indent=4, ensure_ascii=False)
+        _ensure_dir(output_dir)
+        # Serialize in one shot and write the bytes through a single large buffer
+        if orjson is not None:
+            payload = orjson.dumps(diff_data, option=orjson.OPT_INDENT_2)
+        else:
+            payload = json.dumps(diff_data, indent=2, ensure_ascii=False).encode("utf-8")
+        with open(json_file_path, "wb", buffering=_WRITE_BUFFER_SIZE) as f:
+            f.write(payload)
         logger.info("JSON diff file saved successfully.")
     except Exception as e:
         logger.error(f"Failed to save JSON diff: {e}")
 
-def generate_diff_markdown(diff_data: Dict[str, List[Any]], include_header: bool = True) -> str:
-    """Generates a Markdown report from model differences."""
+def _diff_cell(mark: str, item: Any) -> str:
+    """Formats one diff table cell: tuples are joined with ', ', empty values give an empty cell."""
+    item_str = ", ".join(item) if isinstance(item, tuple) else item
+    return f"{mark} {item_str}" if item_str else ""
+
+def write_diff_markdown(diff_data: Dict[str, Sequence[Any]], fp: TextIO, include_header: bool = True) -> None:
+    """Streams a Markdown report of model differences to a writable text stream.
+
+    Args:
+        diff_data (Dict[str, Sequence[Any]]): The diff results from diff_models.
+        fp (TextIO): The stream to write to (an open file or an io.StringIO).
+        include_header (bool): Whether to start the report with the top-level title.
+    """
     if diff_data is None:
-        logger.warning("No diff data provided to generate_diff_markdown. Returning empty string.")
-        return "No differences to report or diff data is unavailable.\n"
+        logger.warning("No diff data provided to write_diff_markdown. Writing placeholder text.")
+        fp.write("No differences to report or diff data is unavailable.\n")
+        return
 
-    md_parts: List[str] = []
+    write = fp.write
     if include_header:
-        md_parts.extend(["# Model Diff Report", ""])
+        write("# Model Diff Report\n")
 
     sections = [
         ("tables", "Tables"),
@@ -120,30 +328,31 @@ def generate_diff_markdown(diff_data: Dict[str, List[Any]], include_header: bool
 
         if not added_items and not removed_items:
             continue
+        if include_header or has_content:
+            write("\n") # Blank line between blocks
         has_content = True
 
-        md_parts.extend([f"## {title}", ""])
-        md_parts.append("| Added | Removed |")
-        md_parts.append("|---|---|")
+        write(f"## {title}\n\n| Added | Removed |\n|---|---|\n")
 
-        max_rows = max(len(added_items), len(removed_items))
-        for i in range(max_rows):
-            added_item_str = ", ".join(added_items[i]) if i < len(added_items) and isinstance(added_items[i], tuple) else (added_items[i] if i < len(added_items) else "")
-            removed_item_str = ", ".join(removed_items[i]) if i < len(removed_items) and isinstance(removed_items[i], tuple) else (removed_items[i] if i < len(removed_items) else "")
-            md_parts.append(f"| {'✅ ' + str(added_item_str) if added_item_str else ''} | {'❌ ' + str(removed_item_str) if removed_item_str else ''} |")
-        md_parts.append("")
+        # Cells are formatted once per column; the shorter column is padded with empty cells
+        added_cells = [_diff_cell("✅", item) for item in added_items]
+        removed_cells = [_diff_cell("❌", item) for item in removed_items]
+        fp.writelines(f"| {added} | {removed} |\n" for added, removed in zip_longest(added_cells, removed_cells, fillvalue=""))
 
     if not has_content and not include_header:
-        return "No changes detected in the schema compared to the previous version.\n"
+        write("No changes detected in the schema compared to the previous version.\n")
     elif not has_content and include_header:
-        md_parts.append("No structural changes detected between the models.")
+        write("\nNo structural changes detected between the models.")
 
-    return "\n".join(md_parts)
+def generate_diff_markdown(diff_data: Dict[str, Sequence[Any]], include_header: bool = True) -> str:
+    """Generates a Markdown report from model differences."""
+    buffer = io.StringIO()
+    write_diff_markdown(diff_data, buffer, include_header=include_header)
+    return buffer.getvalue()
 
-def save_diff_to_markdown(diff_data: Dict[str, List[Any]], output_dir: Path, model_name: str) -> None:
+def save_diff_to_markdown(diff_data: Dict[str, Sequence[Any]], output_dir: Path, model_name: str) -> None:
     """Saves the model differences to a Markdown file."""
-    config = get_config()
-    if not config.get("output_elements", {}).get("save_markdown_diff", True):
+    if not get_output_elements().get("save_markdown_diff", True):
         logger.info("Markdown diff export is disabled in configuration.")
         return
 
@@ -151,77 +360,80 @@ def save_diff_to_markdown(diff_data: Dict[str, List[Any]], output_dir: Path, mod
         logger.warning("No diff data provided to save_diff_to_markdown. Skipping Markdown diff export.")
         return
 
-    md_content = generate_diff_markdown(diff_data, include_header=True)
     md_file_path = output_dir / f"{model_name}_diff_report.md"
     logger.info(f"Saving model differences to Markdown: {md_file_path}...")
     try:
-        output_dir.mkdir(parents=True, exist_ok=True)
-        with open(md_file_path, "w", encoding="utf-8") as f:
-            f.write(md_content)
+        _ensure_dir(output_dir)
+        # Sections are streamed into a large buffer instead of building the whole report in memory
+        with open(md_file_path, "w", encoding="utf-8", buffering=_WRITE_BUFFER_SIZE) as f:
+            write_diff_markdown(diff_data, f, include_header=True)
         logger.info("Markdown diff report saved successfully.")
     except Exception as e:
         logger.error(f"Failed to save Markdown diff report: {e}")
 
+_MERMAID_ID_RE = re.compile(r'[^A-Za-z0-9_]')
+
+# Symbol construction based on from -> to direction
+_MERMAID_CARDINALITY_SYMBOLS = {
+    ("one", "many"): "||--o{",
+    ("many", "one"): "}o--||",
+    ("one", "one"): "||--||",
+    ("many", "many"): "}o--o{",
+}
+
+def _sanitize_mermaid_ids(names: pd.Series) -> pd.Series:
+    """Sanitizes names for Mermaid IDs (alpha-numeric, underscore)."""
+    return names.str.replace(_MERMAID_ID_RE, '_', regex=True)
+
+@functools.lru_cache(maxsize=None)
+def _mermaid_cardinality_symbol(cardinality_str: str, is_active: bool) -> str:
+    """Maps cardinality string to Mermaid symbol (cached: models only use a handful of combinations)."""
+    # Normalize cardinality string: 'many:one', 'one:many', 'one:one', 'many:many'
+    # Default to many:one if not perfectly matched or missing
+    parts = cardinality_str.lower().split(':')
+    if len(parts) == 2:
+        from_card, to_card = parts
+    else:
+        from_card, to_card = "many", "one" # Default
+
+    symbol = _MERMAID_CARDINALITY_SYMBOLS.get((from_card, to_card), "}o--||") # Default to many-to-one
+
+    return symbol if is_active else symbol.replace("--", "..")
+
 def generate_mermaid_er_diagram(tables_df: pd.DataFrame, rels_df: pd.DataFrame) -> str:
     """Generates a Mermaid ER diagram string from tables and relationships DataFrames."""
     if tables_df.empty and rels_df.empty:
         logger.info("No tables or relationships data to generate Mermaid ER diagram.")
         return "```mermaid\nerDiagram\n    %% No data available for ER diagram\n```"
 
-    def sanitize_mermaid_id(name: str) -> str:
-        """Sanitizes a name for Mermaid ID (alpha-numeric, underscore)."""
-        return re.sub(r'[^A-Za-z0-9_]', '_', name)
-
-    def get_cardinality_symbol(cardinality_str: str, is_active: bool) -> str:
-        """Maps cardinality string to Mermaid symbol."""
-        # Normalize cardinality string: 'many:one', 'one:many', 'one:one', 'many:many'
-        # Default to many:one if not perfectly matched or missing
-        parts = cardinality_str.lower().split(':')
-        if len(parts) == 2:
-            from_card, to_card = parts
-        else:
-            from_card, to_card = "many", "one" # Default
-
-        # Symbol construction based on from -> to direction
-        symbol_map = {
-            ("one", "many"): "||--o{",
-            ("many", "one"): "}o--||",
-            ("one", "one"): "||--||",
-            ("many", "many"): "}o--o{",
-        }
-        symbol = symbol_map.get((from_card, to_card), "}o--||") # Default to many-to-one
-
-        return symbol if is_active else symbol.replace("--", "..")
-
     lines: List[str] = ["erDiagram"]
 
-    # Tables
+    # Tables (rows are formatted column-wise by pandas instead of one iterrows() Series per row)
     if not tables_df.empty:
-        for _, row in tables_df.iterrows():
-            table_id = sanitize_mermaid_id(row["table_name"])
-            # Escape double quotes in table names for the label
-            table_label = row["table_name"].replace('"', '#quot;')
-            lines.append(f'    {table_id} [label="{table_label}"]')
-            # TODO: Add columns to table definition if desired
-            # Example: JOB {
-            #   string job_id PK
-            #   string job_title
-            # }
+        table_names = tables_df["table_name"]
+        # Escape double quotes in table names for the label
+        lines.extend(
+            "    " + _sanitize_mermaid_ids(table_names) + ' [label="' + table_names.str.replace('"', '#quot;', regex=False) + '"]'
+        )
+        # TODO: Add columns to table definition if desired
+        # Example: JOB {
+        #   string job_id PK
+        #   string job_title
+        # }
 
     # Relationships
     if not rels_df.empty:
-        for _, row in rels_df.iterrows():
-            from_table_id = sanitize_mermaid_id(row["from_table"])
-            to_table_id = sanitize_mermaid_id(row["to_table"])
-            from_column_label = row["from_column"].replace('"', '#quot;')
-            to_column_label = row["to_column"].replace('"', '#quot;')
-            
-            label = f'{from_column_label} → {to_column_label}'
-            cardinality = row.get("cardinality", "many:one") # Default if missing
-            is_active = row.get("is_active", True)
-            symbol = get_cardinality_symbol(cardinality, is_active)
-
-            lines.append(f'    {from_table_id} {symbol} {to_table_id} : "{label}"')
+        cardinalities = rels_df.get("cardinality", pd.Series("many:one", index=rels_df.index)) # Default if missing
+        actives = rels_df.get("is_active", pd.Series(True, index=rels_df.index))
+        symbols = pd.Series(
+            [_mermaid_cardinality_symbol(cardinality, bool(is_active)) for cardinality, is_active in zip(cardinalities, actives)],
+            index=rels_df.index,
+        )
+        labels = rels_df["from_column"].str.replace('"', '#quot;', regex=False) + " → " + rels_df["to_column"].str.replace('"', '#quot;', regex=False)
+        lines.extend(
+            "    " + _sanitize_mermaid_ids(rels_df["from_table"]) + " " + symbols + " "
+            + _sanitize_mermaid_ids(rels_df["to_table"]) + ' : "' + labels + '"'
+        )
 
     if len(lines) == 1: # Only erDiagram header
         lines.append("    %% No tables or relationships to display")
@@ -230,8 +442,7 @@ def generate_mermaid_er_diagram(tables_df: pd.DataFrame, rels_df: pd.DataFrame)
 
 def save_mermaid_er_diagram(tables_df: pd.DataFrame, rels_df: pd.DataFrame, output_dir: Path, model_name: str) -> None:
     """Saves the Mermaid ER diagram to a .md file."""
-    config = get_config()
-    if not config.get("output_elements", {}).get("save_mermaid_er", True):
+    if not get_output_elements().get("save_mermaid_er", True):
         logger.info("Mermaid ER diagram export is disabled in configuration.")
         return
 
@@ -239,7 +450,7 @@ def save_mermaid_er_diagram(tables_df: pd.DataFrame, rels_df: pd.DataFrame, outp
     mermaid_file_path = output_dir / f"{model_name}_ER_diagram.md"
     logger.info(f"Saving Mermaid ER diagram to: {mermaid_file_path}...")
     try:
-        output_dir.mkdir(parents=True, exist_ok=True)
+        _ensure_dir(output_dir)
         with open(mermaid_file_path, "w", encoding="utf-8") as f:
             f.write(mermaid_content)
         logger.info("Mermaid ER diagram saved successfully.")
@@ -247,9 +458,8 @@ def save_mermaid_er_diagram(tables_df: pd.DataFrame, rels_df: pd.DataFrame, outp
         logger.error(f"Failed to save Mermaid ER diagram: {e}")
 
 def save_database_json_copy(original_db_json_path: Path, output_dir: Path, model_name: str, timestamp: str) -> None:
-    """Saves a timestamped copy of the database.json file."""
-    config = get_config()
-    if not config.get("output_elements", {}).get("save_database_copy", True):
+    """Saves a timestamped copy of the database.json file (a hard link where the filesystem allows)."""
+    if not get_output_elements().get("save_database_copy", True):
         logger.info("Database.json copy is disabled in configuration.")
         return
 
@@ -260,10 +470,21 @@ def save_database_json_copy(original_db_json_path: Path, output_dir: Path, model
     copy_file_path = output_dir / f"{model_name}_database_{timestamp}.json"
     logger.info(f"Saving a copy of database.json to: {copy_file_path}...")
     try:
-        output_dir.mkdir(parents=True, exist_ok=True)
-        # Read and write to handle potential encoding issues and ensure it's a clean copy
-        content = original_db_json_path.read_text(encoding='utf-8')
-        copy_file_path.write_text(content, encoding='utf-8')
+        _ensure_dir(output_dir)
+        # Reruns within the same timestamp granularity produce the same target: skip identical content
+        if copy_file_path.exists():
+            if copy_file_path.samefile(original_db_json_path) or filecmp.cmp(original_db_json_path, copy_file_path, shallow=False):
+                logger.info("Timestamped database.json copy is already up to date.")
+                return
+            copy_file_path.unlink()
+        # The copy is an immutable snapshot and database.json is only ever replaced (never rewritten
+        # in place), so a hard link is safe and costs no I/O regardless of file size
+        try:
+            os.link(original_db_json_path, copy_file_path)
+        except (OSError, NotImplementedError):
+            # Filesystems without hard links (FAT32, some SMB shares): byte-for-byte copy,
+            # shutil uses the kernel's zero-copy path (sendfile/fcopyfile) where available
+            shutil.copyfile(original_db_json_path, copy_file_path)
         logger.info("Timestamped database.json copy saved successfully.")
     except Exception as e:
         logger.error(f"Failed to save database.json copy: {e}")
@@ -272,9 +493,8 @@ def save_database_json_copy(original_db_json_path: Path, output_dir: Path, model
 import zipfile # Moved here as it's only used by this function in this module
 
 def create_pbix_zip_archive(pbix_file_path: Path, output_dir: Path, model_name: str, timestamp: str) -> None:
-    """Creates a zip archive of the PBIX file."""
-    config = get_config()
-    if not config.get("output_elements", {}).get("save_pbix_zip", False):
+    """Creates a zip archive of the PBIX file (or a .pbix.zst file if archive_format is 'zstd')."""
+    if not get_output_elements().get("save_pbix_zip", False):
         logger.info("PBIX ZIP archive creation is disabled in configuration.")
         return
 
@@ -282,15 +502,47 @@ def create_pbix_zip_archive(pbix_file_path: Path, output_dir: Path, model_name:
         logger.error(f"PBIX file not found at {pbix_file_path}. Cannot create zip archive.")
         return
 
+    if get_output_elements().get("archive_format", "stored") == "zstd":
+        try:
+            create_pbix_zstd_archive(pbix_file_path, output_dir, model_name, timestamp)
+            return
+        except ImportError:
+            logger.warning("archive_format 'zstd' requires the zstandard package. Falling back to a stored ZIP archive.")
+
     zip_file_name = f"{model_name}_{timestamp}.zip"
     zip_file_path = output_dir / zip_file_name
 
     logger.info(f"Creating PBIX ZIP archive: {zip_file_path} from {pbix_file_path}...")
     try:
-        output_dir.mkdir(parents=True, exist_ok=True)
-        with zipfile.ZipFile(zip_file_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            zipf.write(pbix_file_path, arcname=pbix_file_path.name)
+        _ensure_dir(output_dir)
+        # A .pbix is already a compressed archive: store it as-is instead of re-deflating it
+        with zipfile.ZipFile(zip_file_path, 'w', zipfile.ZIP_STORED, allowZip64=True) as zipf:
+            # Same entry as zipf.write(), but copied in 1 MiB chunks rather than its 8 KiB ones
+            zinfo = zipfile.ZipInfo.from_file(pbix_file_path, arcname=pbix_file_path.name)
+            zinfo.compress_type = zipfile.ZIP_STORED
+            with open(pbix_file_path, "rb") as src, zipf.open(zinfo, "w") as dst:
+                shutil.copyfileobj(src, dst, _WRITE_BUFFER_SIZE)
         logger.info(f"PBIX ZIP archive created successfully: {zip_file_path}")
     except Exception as e:
         logger.error(f"Error creating PBIX ZIP archive: {e}")
-        # Consider re-raising if this is critical, or just logging if it's optional
\ No newline at end of file
+        # Consider re-raising if this is critical, or just logging if it's optional
+
+def create_pbix_zstd_archive(pbix_file_path: Path, output_dir: Path, model_name: str, timestamp: str) -> None:
+    """Compresses the PBIX file into a .pbix.zst archive with multithreaded zstandard.
+
+    Raises:
+        ImportError: If zstandard is not installed.
+    """
+    import zstandard as zstd
+
+    zst_file_path = output_dir / f"{model_name}_{timestamp}.pbix.zst"
+    logger.info(f"Creating PBIX zstd archive: {zst_file_path} from {pbix_file_path}...")
+    try:
+        _ensure_dir(output_dir)
+        # Level 3 with threads=-1 compresses on all cores, far faster than deflate
+        cctx = zstd.ZstdCompressor(level=3, threads=-1)
+        with open(pbix_file_path, "rb") as src, open(zst_file_path, "wb") as dst:
+            cctx.copy_stream(src, dst, read_size=_WRITE_BUFFER_SIZE, write_size=_WRITE_BUFFER_SIZE)
+        logger.info(f"PBIX zstd archive created successfully: {zst_file_path}")
+    except Exception as e:
+        logger.error(f"Error creating PBIX zstd archive: {e}")
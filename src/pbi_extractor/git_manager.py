@@ -2,6 +2,7 @@
 
 """Manages Git operations like initializing, committing, and pushing changes."""
 
+import re
 import subprocess
 from pathlib import Path
 from typing import List
@@ -12,32 +13,31 @@ from .cli_utils import run_command
 
 logger = get_logger(__name__)
 
-def _run_git_command_wrapper(git_args: List[str], working_dir: Path, suppress_errors: bool = False) -> subprocess.CompletedProcess[str] | None:
-    """Wraps run_command for Git, handling token masking and specific Git errors."""
+# Never block on an interactive credential prompt (output is captured, so nobody could answer it)
+# and keep Git's messages in English so they can be matched reliably.
+_GIT_ENV = {"GIT_TERMINAL_PROMPT": "0", "LC_ALL": "C"}
+
+# user:password@ credentials embedded in an http(s) URL
+_CREDS_RE = re.compile(r"(https?://)([^:/@]+):([^@]+)@")
+
+def _run_git_command_wrapper(git_args: List[str], working_dir: Path, suppress_errors: bool = False, check: bool = True) -> subprocess.CompletedProcess[str] | None:
+    """Wraps run_command for Git, handling token masking and specific Git errors.
+
+    With check=False a non-zero exit code is not treated as an error: the
+    completed process is returned for the caller to inspect.
+    """
     config = get_config()
     git_token = config.get("git_token")
     verbose = config.get("verbose", False)
 
     cmd = ["git"] + git_args
 
-    # Mask the token in the command arguments for logging if it's part of a URL
-    logged_cmd_display_parts = []
-    for arg in cmd:
-        if git_token and git_token in arg and ("http://" in arg or "https://" in arg) and "@" in arg:
-            try:
-                protocol, rest_with_creds = arg.split("://", 1)
-                creds_part, host_and_path = rest_with_creds.split("@", 1)
-                user_part, token_part_in_url = creds_part.split(":", 1)
-                if token_part_in_url == git_token:
-                    logged_cmd_display_parts.append(f"{protocol}://{user_part}:<TOKEN_HIDDEN>@{host_and_path}")
-                else:
-                    logged_cmd_display_parts.append(arg) # Different token or unexpected format
-            except ValueError:
-                # Fallback if URL parsing fails, less precise masking
-                logged_cmd_display_parts.append(arg.replace(git_token, "<TOKEN_HIDDEN>"))
-        else:
-            logged_cmd_display_parts.append(arg)
-    
+    # Mask the token in the command arguments for logging (credentials embedded in URLs first)
+    logged_cmd_display_parts = [
+        _CREDS_RE.sub(r"\1\2:<TOKEN_HIDDEN>@", arg).replace(git_token, "<TOKEN_HIDDEN>") if git_token and git_token in arg else arg
+        for arg in cmd
+    ]
+
     # Log the command with token masked
     logger.info(f"Executing Git command: {' '.join(logged_cmd_display_parts)} in {working_dir}")
 
@@ -46,10 +46,10 @@ def _run_git_command_wrapper(git_args: List[str], working_dir: Path, suppress_er
         # Note: run_command already logs the command, so the above logging is for the masked version.
         # We might want to prevent run_command from logging if we log here, or make its logging DEBUG level.
         # For now, both will log, one masked, one not (if verbose in run_command is True).
-        proc = run_command(cmd, verbose=verbose, cwd=working_dir) # run_command uses its own verbose logic from config
+        proc = run_command(cmd, verbose=verbose, cwd=working_dir, check=check, env=_GIT_ENV) # run_command uses its own verbose logic from config
         return proc
     except subprocess.CalledProcessError as e:
-        logger.error(f"Git command failed: {' '.join(cmd)}")
+        logger.error(f"Git command failed: {' '.join(logged_cmd_display_parts)}")
         logger.error(f"Git error: {e.stderr}")
         if not suppress_errors:
             raise
@@ -145,17 +145,33 @@ def stage_and_commit_changes(repo_path: Path, commit_message: str) -> bool:
     logger.info(f"Staging all changes in {repo_path}...")
     _run_git_command_wrapper(["add", "-A"], working_dir=repo_path)
 
-    # Check if there are changes to commit
-    status_result = _run_git_command_wrapper(["status", "--porcelain"], working_dir=repo_path)
-    if not status_result or not status_result.stdout.strip():
-        logger.info("No changes to commit.")
-        return False # Or True, depending on whether "no changes" is a success
-
+    # Commit directly: an empty index makes git commit exit with "nothing to commit",
+    # which saves a separate `git status` process on every run.
     logger.info(f"Committing changes with message: '{commit_message}'...")
-    _run_git_command_wrapper(["commit", "-m", commit_message], working_dir=repo_path)
+    commit_result = _run_git_command_wrapper(["commit", "-m", commit_message], working_dir=repo_path, check=False)
+    if commit_result.returncode != 0:
+        if "nothing to commit" in commit_result.stdout or "nothing added to commit" in commit_result.stdout:
+            logger.info("No changes to commit.")
+            return False # Or True, depending on whether "no changes" is a success
+        logger.error(f"Git commit failed: {commit_result.stderr.strip() or commit_result.stdout.strip()}")
+        raise subprocess.CalledProcessError(commit_result.returncode, commit_result.args, commit_result.stdout, commit_result.stderr)
     logger.info("Changes committed.")
     return True
 
+def _read_current_branch(repo_path: Path) -> str | None:
+    """Returns the checked-out branch name read from .git/HEAD.
+
+    Returns None when HEAD cannot be read this way (detached HEAD, .git being a
+    worktree file, unreadable file), in which case callers ask git itself.
+    """
+    try:
+        head = (repo_path / ".git" / "HEAD").read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    if head.startswith("ref: refs/heads/"):
+        return head[len("ref: refs/heads/"):]
+    return None
+
 def push_changes_to_remote(repo_path: Path) -> bool:
     """Pushes committed changes to the configured remote and branch."""
     config = get_config()
@@ -169,10 +185,13 @@ def push_changes_to_remote(repo_path: Path) -> bool:
 
     logger.info(f"Pushing changes to remote '{remote_name}' branch '{branch_name}'...")
     try:
-        # Check current branch
-        current_branch_proc = _run_git_command_wrapper(["rev-parse", "--abbrev-ref", "HEAD"], working_dir=repo_path)
-        if not current_branch_proc or current_branch_proc.stdout.strip() != branch_name:
-            logger.info(f"Current branch is '{current_branch_proc.stdout.strip() if current_branch_proc else 'unknown'}'. Checking out '{branch_name}'...")
+        # Check current branch (from .git/HEAD when possible, without starting a git process)
+        current_branch = _read_current_branch(repo_path)
+        if current_branch is None:
+            current_branch_proc = _run_git_command_wrapper(["rev-parse", "--abbrev-ref", "HEAD"], working_dir=repo_path)
+            current_branch = current_branch_proc.stdout.strip() if current_branch_proc else None
+        if current_branch != branch_name:
+            logger.info(f"Current branch is '{current_branch or 'unknown'}'. Checking out '{branch_name}'...")
             # Check if branch exists locally, if not, try to track remote
             try:
                 _run_git_command_wrapper(["checkout", branch_name], working_dir=repo_path, suppress_errors=True)
@@ -2,12 +2,29 @@
 
 """Configures the application logger."""
 
+import atexit
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
 # TODO: Integrate with config_manager for log level and file path
 
+# Background thread writing log records to the log file (see setup_logging)
+_FILE_LOG_LISTENER: QueueListener | None = None
+
+def _stop_file_log_listener() -> None:
+    """Writes out the records still queued for the log file, then closes it."""
+    global _FILE_LOG_LISTENER
+    if _FILE_LOG_LISTENER is not None:
+        _FILE_LOG_LISTENER.stop()
+        for handler in _FILE_LOG_LISTENER.handlers:
+            handler.close()
+        _FILE_LOG_LISTENER = None
+
+atexit.register(_stop_file_log_listener)
+
 def setup_logging(log_level: str = "INFO", log_file: Path | None = None) -> None:
     """Configures basic logging for the application.
 
@@ -30,6 +47,7 @@ def setup_logging(log_level: str = "INFO", log_file: Path | None = None) -> None
     # Get the root logger
     logger = logging.getLogger() # Get root logger
     logger.setLevel(numeric_level)
+    _stop_file_log_listener() # From a previous call
     logger.handlers.clear() # Clear existing handlers if any (e.g., from basicConfig)
 
     # Console Handler
@@ -40,10 +58,16 @@ def setup_logging(log_level: str = "INFO", log_file: Path | None = None) -> None
     if log_file:
         # Ensure log directory exists
         log_file.parent.mkdir(parents=True, exist_ok=True)
-        # File Handler
+        # File Handler, fed through a queue: logging threads only enqueue records and a
+        # listener thread does the file writes. The console stays synchronous so its
+        # lines keep their order relative to the progress messages printed to stdout.
+        global _FILE_LOG_LISTENER
         file_handler = logging.FileHandler(log_file, encoding='utf-8')
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+        logger.addHandler(QueueHandler(log_queue))
+        _FILE_LOG_LISTENER = QueueListener(log_queue, file_handler, respect_handler_level=True)
+        _FILE_LOG_LISTENER.start()
 
     logging.info(f"Logging initialized. Level: {log_level}. File: {log_file if log_file else 'Console'}")
 
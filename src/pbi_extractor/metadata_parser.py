@@ -3,15 +3,72 @@
 """Parses the Power BI model (database.json) and collects metadata."""
 
 import json
+import mmap
+from itertools import repeat
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Callable, Dict, List, Tuple
 
 import pandas as pd
 
+try:
+    import orjson  # Optional: parses JSON in C, much faster than the json module
+except ImportError:
+    orjson = None
+
 from .logger_setup import get_logger
 
 logger = get_logger(__name__)
 
+# Shared JSON parser (bytes or str): orjson when installed, else the stdlib.
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch the stdlib error either way.
+loads_json: Callable[[bytes | str], Any] = orjson.loads if orjson is not None else json.loads
+
+_MMAP_MIN_SIZE = 64 << 20  # Smaller files are cheaper to read in one go than to map
+
+# "from:to" labels for the cardinalities Power BI emits, so the common case is one dict hit
+# instead of two lower() calls and a format; other spellings are lowercased as before
+_CARDINALITY_LABELS: Dict[Tuple[str, str], str] = {
+    (from_card, to_card): f"{from_card}:{to_card}" for from_card in ("many", "one") for to_card in ("many", "one")
+}
+
+def _parse_json_file(file_path: Path, size: int) -> Dict[str, Any]:
+    """Parses a JSON file straight from its bytes.
+
+    Large files are memory-mapped when orjson is available: it parses the mapped pages
+    directly, so the file is never copied into a bytes object first.
+    """
+    if orjson is not None and size >= _MMAP_MIN_SIZE:
+        with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as view: # Released before the map is closed
+                return orjson.loads(view)
+    return loads_json(file_path.read_bytes())
+
+def validate_model(model_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Checks the shape of a model once, so consumers can iterate its lists unchecked.
+
+    Any of 'tables'/'relationships' (and each table's 'columns'/'measures') that is
+    present but not a list is logged and replaced, in place, with an empty list.
+
+    Args:
+        model_data (Dict[str, Any]): The 'model' dictionary from database.json.
+
+    Returns:
+        Dict[str, Any]: The same dictionary, normalized.
+    """
+    def _ensure_list(container: Dict[str, Any], key: str, owner: str) -> None:
+        items = container.get(key)
+        if items is not None and not isinstance(items, list):
+            logger.warning("Expected list for key '%s' in %s, got %s. Treating as empty.", key, owner, type(items))
+            container[key] = []
+
+    _ensure_list(model_data, "tables", "model")
+    _ensure_list(model_data, "relationships", "model")
+    for table_data in model_data.get("tables", ()):
+        if isinstance(table_data, dict):
+            _ensure_list(table_data, "columns", f"table '{table_data.get('name')}'")
+            _ensure_list(table_data, "measures", f"table '{table_data.get('name')}'")
+    return model_data
+
 def load_model_from_json(file_path: Path) -> Dict[str, Any] | None:
     """Loads the model from a database.json file.
 
@@ -20,26 +77,66 @@ def load_model_from_json(file_path: Path) -> Dict[str, Any] | None:
 
     Returns:
         Dict[str, Any] | None: The 'model' dictionary from the JSON, or None if loading fails.
+            Each call parses the file anew; the returned dict is passed to every consumer
+            (metadata collection and diff), so callers must treat it as read-only.
     """
-    logger.info(f"Loading model from {file_path}...")
-    if not file_path.exists():
-        logger.error(f"Model file not found: {file_path}")
-        return None
+    logger.info("Loading model from %s...", file_path)
     try:
-        data = json.loads(file_path.read_text(encoding="utf-8"))
-        model = data.get("model")
+        stat = file_path.stat() # Also serves as the existence check
+        data = _parse_json_file(file_path, stat.st_size)
+        model = data.get("model") if isinstance(data, dict) else None
         if model is None:
-            logger.warning(f"'model' key not found in {file_path}. File might be malformed or not a PBI model JSON.")
+            logger.warning("'model' key not found in %s. File might be malformed or not a PBI model JSON.", file_path)
+            return None
+        if not isinstance(model, dict):
+            logger.warning("'model' in %s is a %s, expected an object. File might be malformed.", file_path, type(model).__name__)
             return None
-        logger.info(f"Model loaded successfully from {file_path}.")
-        return model
+        logger.info("Model loaded successfully from %s.", file_path)
+        return validate_model(model)
+    except FileNotFoundError:
+        logger.error("Model file not found: %s", file_path)
+        return None
     except json.JSONDecodeError as e:
-        logger.error(f"Failed to decode JSON from {file_path}: {e}")
+        logger.error("Failed to decode JSON from %s: %s", file_path, e)
         return None
     except Exception as e:
-        logger.error(f"An unexpected error occurred while loading model from {file_path}: {e}")
+        logger.error("An unexpected error occurred while loading model from %s: %s", file_path, e)
         return None
 
+def _fields_df_with_pandas(fields_columns: Dict[str, List[Any]]) -> pd.DataFrame:
+    """Builds the fields DataFrame with pandas, object_type categorical as on the Arrow path."""
+    fields_df = pd.DataFrame(fields_columns)
+    fields_df["object_type"] = fields_df["object_type"].astype("category")
+    return fields_df
+
+def _build_fields_df(fields_columns: Dict[str, List[Any]]) -> pd.DataFrame:
+    """Builds the fields DataFrame, through Arrow arrays with a fixed schema when pyarrow is installed.
+
+    Arrow converts each column with its declared type in one pass instead of pandas
+    inferring it, and object_type (three distinct values) becomes a dictionary-encoded
+    categorical. Without pyarrow, or if a malformed model has values of unexpected types,
+    pandas builds it (see _fields_df_with_pandas).
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return _fields_df_with_pandas(fields_columns)
+
+    arrow_types = {
+        "table": pa.string(),
+        "object_name": pa.string(),
+        "object_type": pa.dictionary(pa.int8(), pa.string()),
+        "data_type": pa.string(),
+        "is_hidden": pa.bool_(),
+        "description": pa.string(),
+        "expression": pa.large_string(),
+    }
+    try:
+        arrays = [pa.array(fields_columns[name], type=arrow_type) for name, arrow_type in arrow_types.items()]
+    except (pa.ArrowException, TypeError, ValueError):
+        return _fields_df_with_pandas(fields_columns)
+    return pa.Table.from_arrays(arrays, names=list(arrow_types)).to_pandas(split_blocks=True, self_destruct=True)
+
 def collect_metadata_from_model(
     model_data: Dict[str, Any]
 ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
@@ -52,59 +149,72 @@ def collect_metadata_from_model(
         Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]: DataFrames for tables, fields, and relationships.
     """
     logger.info("Collecting metadata from model data...")
-    tables_list: List[Dict[str, Any]] = []
-    fields_list: List[Dict[str, Any]] = []
-    relationships_list: List[Dict[str, Any]] = []
+    # Column-oriented buffers: one list per output column, turned into DataFrames at the end
+    tables_columns: Dict[str, List[Any]] = {"table_name": [], "is_hidden": [], "description": []}
+    fields_columns: Dict[str, List[Any]] = {
+        "table": [], "object_name": [], "object_type": [], "data_type": [],
+        "is_hidden": [], "description": [], "expression": [],
+    }
+    relationships_columns: Dict[str, List[Any]] = {
+        "from_table": [], "from_column": [], "to_table": [], "to_column": [],
+        "cardinality": [], "cross_filtering_behavior": [], "is_active": [],
+    }
 
     if not isinstance(model_data, dict):
         logger.warning("Invalid model_data format: expected a dictionary.")
-        return pd.DataFrame(tables_list), pd.DataFrame(fields_list), pd.DataFrame(relationships_list)
-
-    for tbl in model_data.get("tables", []):
-        tables_list.append({
-            "table_name": tbl.get("name", "UnknownTable"),
-            "is_hidden": tbl.get("isHidden", False),
-            "description": tbl.get("description", ""),
-        })
-        for col in tbl.get("columns", []):
-            fields_list.append({
-                "table": tbl.get("name", "UnknownTable"),
-                "object_name": col.get("name", "UnknownColumn"),
-                "object_type": "calculated column" if col.get("type") else "column" , # If type field exists the object is calculated column otherwise it is column
-                "data_type": col.get("dataType"),
-                "is_hidden": col.get("isHidden", False),
-                "description": col.get("description", ""),
-                "expression": col.get("expression",""), # Expression is relevant field only for DAX for calculated columns
-            })
-        for meas in tbl.get("measures", []):
-            fields_list.append({
-                "table": tbl.get("name", "UnknownTable"),
-                "object_name": meas.get("name", "UnknownMeasure"),
-                "object_type": "measure",
-                "data_type": None,  # Measures don't have a fixed data type in the same way columns do
-                "is_hidden": meas.get("isHidden", False),
-                "description": meas.get("description", ""),
-                "expression": meas.get("expression", ""),
-            })
-
-    for rel in model_data.get("relationships", []):
-        from_card = rel.get("fromCardinality", "many")
-        to_card = rel.get("toCardinality", "one")
-        cardinality = f"{from_card.lower()}:{to_card.lower()}"
-
-        relationships_list.append({
-            "from_table": rel.get("fromTable", "UnknownFromTable"),
-            "from_column": rel.get("fromColumn", "UnknownFromColumn"),
-            "to_table": rel.get("toTable", "UnknownToTable"),
-            "to_column": rel.get("toColumn", "UnknownToColumn"),
-            "cardinality": cardinality,
-            "cross_filtering_behavior": rel.get("crossFilteringBehavior", "singleDirection"),
-            "is_active": rel.get("isActive", True),
-        })
-
-    tables_df = pd.DataFrame(tables_list)
-    fields_df = pd.DataFrame(fields_list)
-    rels_df = pd.DataFrame(relationships_list)
-
-    logger.info(f"Metadata collection complete. Found {len(tables_df)} tables, {len(fields_df)} fields, {len(rels_df)} relationships.")
+        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+
+    tables = model_data.get("tables", [])
+    tables_columns["table_name"] = [tbl.get("name", "UnknownTable") for tbl in tables]
+    tables_columns["is_hidden"] = [tbl.get("isHidden", False) for tbl in tables]
+    tables_columns["description"] = [tbl.get("description", "") for tbl in tables]
+
+    f_table = fields_columns["table"]
+    f_name = fields_columns["object_name"]
+    f_type = fields_columns["object_type"]
+    f_data_type = fields_columns["data_type"]
+    f_hidden = fields_columns["is_hidden"]
+    f_desc = fields_columns["description"]
+    f_expr = fields_columns["expression"]
+    for tbl, table_name in zip(tables, tables_columns["table_name"]):
+        columns = tbl.get("columns", [])
+        f_table.extend(repeat(table_name, len(columns)))
+        f_name.extend([col.get("name", "UnknownColumn") for col in columns])
+        # If type field exists the object is calculated column otherwise it is column
+        f_type.extend(["calculated column" if col.get("type") else "column" for col in columns])
+        f_data_type.extend([col.get("dataType") for col in columns])
+        f_hidden.extend([col.get("isHidden", False) for col in columns])
+        f_desc.extend([col.get("description", "") for col in columns])
+        # Expression is relevant field only for DAX for calculated columns
+        f_expr.extend([col.get("expression", "") for col in columns])
+
+        measures = tbl.get("measures", [])
+        f_table.extend(repeat(table_name, len(measures)))
+        f_name.extend([meas.get("name", "UnknownMeasure") for meas in measures])
+        f_type.extend(repeat("measure", len(measures)))
+        # Measures don't have a fixed data type in the same way columns do
+        f_data_type.extend(repeat(None, len(measures)))
+        f_hidden.extend([meas.get("isHidden", False) for meas in measures])
+        f_desc.extend([meas.get("description", "") for meas in measures])
+        f_expr.extend([meas.get("expression", "") for meas in measures])
+
+    relationships = model_data.get("relationships", [])
+    relationships_columns["from_table"] = [rel.get("fromTable", "UnknownFromTable") for rel in relationships]
+    relationships_columns["from_column"] = [rel.get("fromColumn", "UnknownFromColumn") for rel in relationships]
+    relationships_columns["to_table"] = [rel.get("toTable", "UnknownToTable") for rel in relationships]
+    relationships_columns["to_column"] = [rel.get("toColumn", "UnknownToColumn") for rel in relationships]
+    relationships_columns["cardinality"] = [
+        _CARDINALITY_LABELS.get(cards) or f"{cards[0].lower()}:{cards[1].lower()}"
+        for cards in ((rel.get("fromCardinality", "many"), rel.get("toCardinality", "one")) for rel in relationships)
+    ]
+    relationships_columns["cross_filtering_behavior"] = [rel.get("crossFilteringBehavior", "singleDirection") for rel in relationships]
+    relationships_columns["is_active"] = [rel.get("isActive", True) for rel in relationships]
+
+    tables_df = pd.DataFrame(tables_columns)
+    fields_df = _build_fields_df(fields_columns)
+    rels_df = pd.DataFrame(relationships_columns)
+    # A handful of distinct values each: stored as codes into a shared set of strings
+    rels_df[["cardinality", "cross_filtering_behavior"]] = rels_df[["cardinality", "cross_filtering_behavior"]].astype("category")
+
+    logger.info("Metadata collection complete. Found %s tables, %s fields, %s relationships.", len(tables_df), len(fields_df), len(rels_df))
     return tables_df, fields_df, rels_df
\ No newline at end of file
@@ -9,6 +9,7 @@ from typing import Dict, List
 from .cli_utils import run_command
 from .logger_setup import get_logger
 from .config_manager import get_config
+from .metadata_parser import loads_json
 
 logger = get_logger(__name__)
 
@@ -29,7 +30,7 @@ def get_first_pbi_session() -> Dict[str, str]:
     try:
         proc = run_command([pbi_tools_exe, "info"], verbose=verbose)
     except Exception as e:
-        logger.error(f"Failed to execute pbi-tools info: {e}")
+        logger.error("Failed to execute pbi-tools info: %s", e)
         raise RuntimeError("Failed to get Power BI session info from pbi-tools.") from e
 
     raw_output = proc.stdout
@@ -37,14 +38,14 @@ def get_first_pbi_session() -> Dict[str, str]:
 
     if json_start_index < 0:
         logger.error("No JSON found in pbi-tools info output.")
-        logger.debug(f"pbi-tools info raw output:\n{raw_output}")
+        logger.debug("pbi-tools info raw output:\n%s", raw_output)
         raise RuntimeError("No JSON found in pbi-tools info output.")
 
     try:
-        info = json.loads(raw_output[json_start_index:])
+        info = loads_json(raw_output[json_start_index:])
     except json.JSONDecodeError as e:
-        logger.error(f"Failed to parse JSON from pbi-tools info: {e}")
-        logger.debug(f"pbi-tools info raw output (from json_start_index):\n{raw_output[json_start_index:]}")
+        logger.error("Failed to parse JSON from pbi-tools info: %s", e)
+        logger.debug("pbi-tools info raw output (from json_start_index):\n%s", raw_output[json_start_index:])
         raise RuntimeError("Failed to parse JSON from pbi-tools info.") from e
 
     sessions = info.get("pbiSessions", [])
@@ -54,17 +55,20 @@ def get_first_pbi_session() -> Dict[str, str]:
 
     # TODO: Manage multiple sessions
     if len(sessions) > 1:
-        logger.warning(f"Multiple Power BI sessions found. Using the first one: {sessions[0]}")
+        logger.warning("Multiple Power BI sessions found. Using the first one: %s", sessions[0])
 
     session = sessions[0] # Assuming the first session is the target
     pbix_path = session.get("PbixPath")
-    pid = str(session.get("ProcessId"))
+    pid_raw = session.get("ProcessId")
 
-    if not pbix_path or not pid:
-        logger.error(f"Found session but PbixPath or ProcessId is missing: {session}")
+    # Checked before any conversion: str(None) would be the non-empty string "None"
+    if not pbix_path or pid_raw is None or pid_raw == "":
+        logger.error("Found session but PbixPath or ProcessId is missing: %s", session)
         raise RuntimeError("Found Power BI session but essential details (PbixPath, ProcessId) are missing.")
+    # pbi-tools reports the PID as a number; it is passed on as a command-line argument
+    pid = pid_raw if isinstance(pid_raw, str) else str(pid_raw)
 
-    logger.info(f"Power BI session found: PBIX='{pbix_path}', PID={pid}")
+    logger.info("Power BI session found: PBIX='%s', PID=%s", pbix_path, pid)
     return {"pbix_path": pbix_path, "pid": pid}
 
 def extract_model_from_session(session_info: Dict[str, str], extract_folder: Path) -> Path:
@@ -91,7 +95,7 @@ def extract_model_from_session(session_info: Dict[str, str], extract_folder: Pat
     pbix_path = session_info["pbix_path"]
     pid = session_info["pid"]
 
-    logger.info(f"Starting model extraction for PBIX: {pbix_path} (PID: {pid}) into {extract_folder}")
+    logger.info("Starting model extraction for PBIX: %s (PID: %s) into %s", pbix_path, pid, extract_folder)
 
     # Ensure extract_folder exists
     extract_folder.mkdir(parents=True, exist_ok=True)
@@ -105,17 +109,18 @@ def extract_model_from_session(session_info: Dict[str, str], extract_folder: Pat
     ]
 
     try:
-        run_command(cmd, verbose=verbose)
+        # Extraction output is only logged, never parsed: stream it instead of buffering it all
+        run_command(cmd, verbose=verbose, capture=False)
     except Exception as e:
-        logger.error(f"Model extraction failed: {e}")
+        logger.error("Model extraction failed: %s", e)
         raise RuntimeError("Model extraction command failed.") from e
 
     # Standard path for the model file after pbi-tools extraction
     model_file_path = extract_folder / "Model" / "database.json"
 
     if not model_file_path.exists():
-        logger.error(f"Extracted model file 'database.json' not found at {model_file_path}")
+        logger.error("Extracted model file 'database.json' not found at %s", model_file_path)
         raise FileNotFoundError(f"Extracted model file 'database.json' not found at {model_file_path}")
 
-    logger.info(f"Model successfully extracted to {model_file_path}")
+    logger.info("Model successfully extracted to %s", model_file_path)
     return model_file_path
\ No newline at end of file